@@ -0,0 +1,53 @@
+import glob
+import os
+
+import librosa
+import numpy as np
+from manifest import cache_key
+
+# Where decoded audio is kept; override with the AUDIO_CACHE_DIR environment variable
+DEFAULT_CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR", ".audio-cache")
+
+def load_audio(path, sr=22050, mono=True, cache_dir=None, mmap=False):
+    """
+    Drop-in replacement for librosa.load that decodes each file only once.
+
+    The first call decodes the file with librosa and stores the float32 samples as a .npy file in the cache folder.
+    Later calls with the same file (unchanged size and mtime), sample rate and mono flag read the .npy file instead.
+
+    Args:
+        path (str): Path to the audio file (.m4a, .wav, ...).
+        sr (int or None): Target sample rate, or None to keep the native rate (same as librosa.load).
+        mono (bool): Whether to downmix to mono.
+        cache_dir (str): Folder holding the decoded .npy files. Defaults to DEFAULT_CACHE_DIR.
+        mmap (bool): Return a read-only memory map instead of loading the samples into memory.
+
+    Returns:
+        tuple: (samples as float32 np.ndarray, sample rate as int)
+    """
+
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    key = cache_key(path, sr, mono)
+
+    # 1. Cache hit: the sample rate is part of the file name, so sr=None also resolves without decoding
+    hits = glob.glob(os.path.join(cache_dir, key + "-*.npy"))
+    if hits:
+        cached_sr = int(os.path.splitext(os.path.basename(hits[0]))[0].rsplit("-", 1)[1])
+        return np.load(hits[0], mmap_mode="r" if mmap else None), cached_sr
+
+    # 2. Cache miss: decode and resample once
+    y, sr_out = librosa.load(path, sr=sr, mono=mono)
+    y = np.ascontiguousarray(y, dtype=np.float32)
+    sr_out = int(sr_out)
+
+    # 3. Write atomically so parallel runs never see a half-written file
+    os.makedirs(cache_dir, exist_ok=True)
+    cache_file = os.path.join(cache_dir, f"{key}-{sr_out}.npy")
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(tmp_file, "wb") as f:
+        np.save(f, y)
+    os.replace(tmp_file, cache_file)
+
+    if mmap:
+        return np.load(cache_file, mmap_mode="r"), sr_out
+    return y, sr_out
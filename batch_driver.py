@@ -0,0 +1,138 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from manifest import Manifest, file_digest, params_key
+
+# Minimum number of seconds between manifest writes during a run
+MANIFEST_SAVE_INTERVAL = 2.0
+
+def _convert_chunk(convert, tasks, convert_kwargs, with_digest=False):
+    """
+    Runs one chunk of conversions inside a worker process, isolating failures per file.
+
+    Args:
+        convert (callable): convert(input_path, output_path, **convert_kwargs), returning the audio duration in
+            seconds, or a (duration, output_paths) tuple if it writes something other than output_path.
+        tasks (list): List of (input_path, output_path) pairs.
+        convert_kwargs (dict): Extra keyword arguments for convert.
+        with_digest (bool): Also hash each input file (for the manifest).
+
+    Returns:
+        list: One (input_path, output_path, audio_seconds, outputs, digest, error) tuple per task;
+            error is None on success.
+    """
+
+    results = []
+    for input_path, output_path in tasks:
+        try:
+            result = convert(input_path, output_path, **convert_kwargs)
+            duration, outputs = result if isinstance(result, tuple) else (result, [output_path])
+            digest = file_digest(input_path) if with_digest else None
+            results.append((input_path, output_path, float(duration or 0.0), outputs, digest, None))
+        except Exception as e:
+            results.append((input_path, output_path, 0.0, [], None, f"{type(e).__name__}: {e}"))
+    return results
+
+def process_files_in_folder(convert, input_folder, output_folder, extensions=(".m4a",), output_ext=".png",
+                            workers=None, chunk_size=4, incremental=True, **convert_kwargs):
+    """
+    Converts every matching file in a folder with a pool of worker processes and prints a throughput summary.
+
+    Args:
+        convert (callable): Module-level function convert(input_path, output_path, **convert_kwargs).
+            It should return the duration of the processed audio in seconds (used for the summary).
+        input_folder (str): Path to the folder containing the audio files.
+        output_folder (str): Path to save the converted files.
+        extensions (tuple): File extensions to process.
+        output_ext (str): Extension of the output files.
+        workers (int): Number of worker processes (None uses every CPU core, 1 runs in the current process).
+        chunk_size (int): Number of files handed to a worker per task.
+        incremental (bool): Skip inputs that the output folder's manifest says are already converted with the
+            same parameters; record every new conversion so an interrupted run resumes where it stopped.
+        **convert_kwargs: Passed through to convert.
+
+    Returns:
+        dict: Summary with the number of processed, skipped and failed files, elapsed time and throughput.
+    """
+
+    # 1. Create the output folder if it doesn't exist
+    os.makedirs(output_folder, exist_ok=True)
+
+    # 2. Collect the (input, output) pairs that are not up to date and split them into chunks
+    manifest = Manifest(output_folder) if incremental else None
+    params = params_key(convert, convert_kwargs)
+    tasks, skipped = [], 0
+    for filename in sorted(os.listdir(input_folder)):
+        if filename.endswith(tuple(extensions)):
+            input_file_path = os.path.join(input_folder, filename)
+            output_file_path = os.path.join(output_folder, os.path.splitext(filename)[0] + output_ext)
+            if manifest is not None and manifest.is_current(input_file_path, params):
+                skipped += 1
+                continue
+            tasks.append((input_file_path, output_file_path))
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+    if skipped:
+        print(f"Skipped: {skipped} files already up to date in {output_folder}")
+
+    processed, failed, audio_seconds = 0, 0, 0.0
+    start = last_save = time.perf_counter()
+
+    def report(results):
+        nonlocal processed, failed, audio_seconds, last_save
+        for input_file_path, output_file_path, duration, outputs, digest, error in results:
+            if error is None:
+                processed += 1
+                audio_seconds += duration
+                if manifest is not None:
+                    manifest.record(input_file_path, params, outputs, digest)
+                print(f"Processed: {input_file_path} -> {output_file_path}")
+            else:
+                failed += 1
+                print(f"Failed: {input_file_path} ({error})")
+
+        # Flush the manifest now and then so an interrupted run keeps its progress
+        if manifest is not None and time.perf_counter() - last_save >= MANIFEST_SAVE_INTERVAL:
+            manifest.save()
+            last_save = time.perf_counter()
+
+    # 3. Run the chunks, either in-process or on a pool with a bounded number of chunks in flight
+    if workers == 1:
+        for chunk in chunks:
+            report(_convert_chunk(convert, chunk, convert_kwargs, manifest is not None))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            max_pending = 2 * workers
+            pending = {}
+            remaining = iter(chunks)
+            while True:
+                for chunk in remaining:
+                    future = pool.submit(_convert_chunk, convert, chunk, convert_kwargs, manifest is not None)
+                    pending[future] = chunk
+                    if len(pending) >= max_pending:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = pending.pop(future)
+                    try:
+                        report(future.result())
+                    except Exception as e:  # The worker itself died; mark the whole chunk as failed
+                        report([(i, o, 0.0, [], None, f"{type(e).__name__}: {e}") for i, o in chunk])
+
+    # 4. Save the manifest and print the throughput summary
+    if manifest is not None:
+        manifest.save()
+    elapsed = time.perf_counter() - start
+    summary = {
+        "processed": processed,
+        "skipped": skipped,
+        "failed": failed,
+        "elapsed_s": elapsed,
+        "files_per_s": processed / elapsed if elapsed > 0 else 0.0,
+        "audio_s_per_s": audio_seconds / elapsed if elapsed > 0 else 0.0,
+    }
+    print(f"Done: {processed} processed, {skipped} skipped, {failed} failed in {elapsed:.1f} s "
+          f"({summary['files_per_s']:.2f} files/s, {summary['audio_s_per_s']:.1f} audio-s/s)")
+    return summary
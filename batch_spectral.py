@@ -0,0 +1,101 @@
+from functools import lru_cache
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import fft as sp_fft
+from scipy.signal import get_window
+
+@lru_cache(maxsize=None)
+def cached_window(window, n_fft, dtype=np.float32):
+    """
+    Periodic analysis window (the one librosa.stft and scipy.signal.stft use), built once per size.
+
+    Args:
+        window (str): Window name (e.g. 'hann').
+        n_fft (int): Window length.
+        dtype (type): Floating point type.
+
+    Returns:
+        np.ndarray: Read-only window of length n_fft.
+    """
+
+    w = get_window(window, n_fft).astype(dtype)
+    w.flags.writeable = False
+    return w
+
+def group_by_length(lengths, max_pad=0.0):
+    """
+    Groups signals so that each group can be zero-padded into one 2D array.
+
+    Args:
+        lengths (list): Length of every signal.
+        max_pad (float): Largest allowed padding as a fraction of the shortest signal in a group
+            (0 groups only equal lengths).
+
+    Returns:
+        list: Arrays of signal indices, one per group, each sorted by length.
+    """
+
+    order = np.argsort(lengths, kind='stable')
+    groups, start = [], 0
+    for k in range(1, len(order) + 1):
+        if k == len(order) or lengths[order[k]] > lengths[order[start]] * (1 + max_pad):
+            groups.append(order[start:k])
+            start = k
+    return groups
+
+def batch_stft(signals, n_fft=2048, hop_length=None, window='hann', convention='librosa', max_pad=0.25,
+               dtype=np.float32, workers=None):
+    """
+    STFT magnitude of many signals, one framed FFT per length group.
+
+    Zero-padding a signal does not change its own frames, so every signal gets exactly the frames it would get
+    on its own, whatever group it lands in.
+
+    Args:
+        signals (list): 1D signals.
+        n_fft (int): Frame length.
+        hop_length (int): Hop between frames (defaults to n_fft // 4 for 'librosa' and n_fft // 2 for 'scipy').
+        window (str): Window name.
+        convention (str): 'librosa' matches np.abs(librosa.stft(y, n_fft, hop_length)) (center=True with zero
+            padding, unscaled); 'scipy' matches np.abs(scipy.signal.stft(y, nperseg=n_fft)[2]) (zero boundary,
+            padded to whole frames, divided by the window sum).
+        max_pad (float): See group_by_length.
+        dtype (type): Floating point type of the computation.
+        workers (int): Threads used by scipy.fft (-1 uses every core).
+
+    Returns:
+        list: Magnitude spectrogram of shape (n_fft // 2 + 1, frames) for every signal, in input order.
+    """
+
+    if convention not in ('librosa', 'scipy'):
+        raise ValueError(f"Unknown STFT convention: {convention}")
+    hop_length = hop_length or (n_fft // 4 if convention == 'librosa' else n_fft // 2)
+    win = cached_window(window, n_fft, dtype)
+    scale = 1.0 if convention == 'librosa' else float(win.sum())
+    lengths = [len(s) for s in signals]
+
+    def n_frames(length):
+        if convention == 'librosa':
+            return 1 + (length + 2 * (n_fft // 2) - n_fft) // hop_length
+        # scipy pads to a whole number of frames after the boundary padding
+        return 1 + -(-max(length + 2 * (n_fft // 2) - n_fft, 0) // hop_length)
+
+    spectra = [None] * len(signals)
+    for group in group_by_length(lengths, max_pad):
+        # 1. Zero-pad the group into one array, with n_fft // 2 zeros on both sides
+        frames = n_frames(lengths[group[-1]])
+        batch = np.zeros((len(group), (frames - 1) * hop_length + n_fft), dtype=dtype)
+        for row, i in enumerate(group):
+            batch[row, n_fft // 2:n_fft // 2 + lengths[i]] = signals[i]
+
+        # 2. Frame, window and transform the whole group at once
+        framed = sliding_window_view(batch, n_fft, axis=-1)[:, ::hop_length][:, :frames] * win
+        magnitude = np.abs(sp_fft.rfft(framed, axis=-1, workers=workers))
+        if scale != 1.0:
+            magnitude /= scale
+
+        # 3. Each signal keeps only its own frames
+        for row, i in enumerate(group):
+            spectra[i] = magnitude[row, :n_frames(lengths[i])].T
+    return spectra
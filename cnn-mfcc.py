@@ -1,65 +1,87 @@
-import tensorflow as tf
-from keras import layers, models
 import matplotlib.pyplot as plt
-import os
-from PIL import Image
 import numpy as np
+import os
 from sklearn.model_selection import train_test_split
+from cnn_model import StoreSequence, build_model, training_callbacks
+from feature_store import is_store_current, load_batch, open_feature_store, pack_image_folder
+from input_pipeline import folder_dataset, store_dataset
+from metrics import evaluate_model
+from model_export import calibration_indices, export_model
+
+# Input mode: 'png' reads rendered spectrogram images, 'features' reads the 1-channel
+# feature tensors written by transform-features.py (no PNG decode, no colormap)
+input_mode = 'png'
+
+# Training input: 'sequence' feeds batches from the memory-mapped store with a keras Sequence,
+# 'tf.data' streams them through a tf.data pipeline (parallel decode, cache, prefetch)
+pipeline = 'sequence'
 
 # Define the path to your images folder
 image_folder = 'spectrograms'  # Update with the correct path
+image_store = 'spectrograms-store'  # uint8 memory-mapped copy of image_folder, rebuilt when the folder changes
+feature_folder = 'mel-features'  # Store written by transform-features.py
 image_size = (128, 128)  # Resize images to 128x128
 
-# Create lists to hold images and labels
-images = []
-labels = []
-
-# Load images and labels based on filename pattern
-for filename in os.listdir(image_folder):
-    if filename.endswith('.png'):
-        # Extract label from filename (first number before the dash)
-        label = int(filename.split('-')[0])
-        
-        # Only include labels between 0 and 10
-        if 0 <= label <= 10:
-            labels.append(label)
-            
-            # Load image and convert to RGB
-            img_path = os.path.join(image_folder, filename)
-            img = Image.open(img_path).resize(image_size).convert('RGB')  # Convert to RGB
-            img_array = np.array(img) / 255.0  # Normalize pixel values
-            images.append(img_array)
-
-# Convert lists to numpy arrays
-images = np.array(images)
-labels = np.array(labels)
-
-# Split the data into training and testing sets
-train_images, test_images, train_labels, test_labels = train_test_split(images,
-                                                                        labels,
-                                                                        test_size=0.1, random_state=42)
-
-# Define the CNN model with correct input shape
-model = models.Sequential([
-    layers.Input(shape=(128, 128, 3)),  # Adjusted input shape for 128x128 images
-    layers.Conv2D(32, (3, 3), activation='relu'),
-    layers.MaxPooling2D((2, 2)),
-    layers.Conv2D(64, (3, 3), activation='relu'),
-    layers.MaxPooling2D((2, 2)),
-    layers.Conv2D(64, (3, 3), activation='relu'),
-    layers.Flatten(),
-    layers.Dense(64, activation='relu'),
-    layers.Dense(11, activation='softmax')  # Adjust output layer to match the number of classes (0-10 => 11 classes)
-])
-
-# Compile the model
-model.compile(optimizer='adam',
-              loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True),
-              metrics=['accuracy'])
-
-# Train the model
-history = model.fit(train_images, train_labels, batch_size=8, epochs=50,
-                    validation_data=(test_images, test_labels))
+# Open the dataset as a memory map (nothing is read until a batch needs it)
+if input_mode == 'features':
+    features, labels, _ = open_feature_store(feature_folder)
+elif pipeline == 'tf.data':
+    # tf.data decodes the PNG files itself, so there is no store to pack
+    filenames = sorted(f for f in os.listdir(image_folder) if f.endswith('.png'))
+    features, labels = None, np.array([int(f.split('-')[0]) for f in filenames])
+else:
+    # Pack the PNG folder into a uint8 store once, then reuse it
+    if not is_store_current(image_store, image_folder):
+        pack_image_folder(image_folder, image_store, size=image_size, label_range=(0, 10))
+    features, labels, _ = open_feature_store(image_store)
+labels = labels.astype(np.int64)
+
+# Only include labels between 0 and 10
+indices = np.flatnonzero((labels >= 0) & (labels <= 10))
+
+# Split the sample indices into training and testing sets
+train_indices, test_indices = train_test_split(indices, test_size=0.1, random_state=42)
+
+# Calibration samples for the int8 export, drawn from the whole training split exactly as in quantize-cnn.py
+calibration = calibration_indices(train_indices)
+
+# Hold out part of the training samples for early stopping, the learning-rate schedule and the best checkpoint,
+# so the test set is only used for the final report
+train_indices, validation_indices = train_test_split(train_indices, test_size=0.1, random_state=42)
+
+def load_inputs(sample_indices):
+    """Loads the model inputs of a few samples (test, validation or calibration set) into memory."""
+    if features is None:
+        data = folder_dataset(image_folder, [filenames[i] for i in sample_indices], labels[sample_indices],
+                              batch_size=64, image_size=image_size, training=False, cache=False)
+        return np.concatenate([batch.numpy() for batch, _ in data])
+    return load_batch(features, sample_indices)
+
+if pipeline == 'tf.data' and features is None:
+    train_data = folder_dataset(image_folder, [filenames[i] for i in train_indices], labels[train_indices],
+                                batch_size=8, image_size=image_size, seed=42)
+elif pipeline == 'tf.data':
+    train_data = store_dataset(features, labels, train_indices, batch_size=8, seed=42)
+else:
+    train_data = StoreSequence(features, labels, train_indices, batch_size=8)
+test_images, test_labels = load_inputs(test_indices), labels[test_indices]
+validation_images, validation_labels = load_inputs(validation_indices), labels[validation_indices]
+calibration_images = load_inputs(calibration)
+input_shape = test_images.shape[1:]  # (128, 128, 3) for images, (128, 128, 1) for features
+
+# Define and compile the CNN model with correct input shape
+model = build_model(input_shape)
+
+# Train the model: at most 50 epochs, stopping early once val_accuracy stops improving; rerunning after an
+# interruption resumes from the last checkpoint in checkpoint_dir
+checkpoint_dir = 'cnn-mfcc-checkpoints'
+steps_per_epoch = len(train_data) if isinstance(train_data, StoreSequence) else None
+history = model.fit(train_data, epochs=50,
+                    validation_data=(validation_images, validation_labels),
+                    callbacks=training_callbacks(checkpoint_dir, steps_per_epoch=steps_per_epoch))
+
+# Export the trained model (.keras, SavedModel and TFLite float32/int8) for live-classify.py and inference_server.py
+export_model(model, 'cnn-mfcc-export', representative_inputs=calibration_images)
 
 # Increase plot size
 plt.figure(figsize=(12, 8))  # Set figure size (width, height)
@@ -73,7 +95,7 @@ plt.xlabel('Epoch', fontsize=24, fontname='Times New Roman')
 plt.ylabel('Accuracy', fontsize=24, fontname='Times New Roman')
 
 # Adjust axis limits
-plt.xlim([0, 50])  # Adjusted to 50 epochs since the training used 50 epochs
+plt.xlim([0, len(history.history['accuracy'])])  # Number of epochs actually trained
 plt.ylim([0.0, 1.0])
 
 # Remove title
@@ -89,44 +111,8 @@ plt.savefig('result-specto-custom.png')
 # Show the plot
 plt.show()
 
-# Import necessary libraries
-import numpy as np
-
-# Evaluate the model on the test set and output predicted labels
-def evaluate_with_custom_accuracy_and_std(test_images, test_labels):
-    """Evaluate the model and output predicted and true labels, along with custom accuracy calculation."""
-    predictions = model.predict(test_images)
-    predicted_labels = np.argmax(predictions, axis=1)
-    
-    # Create a list to store the custom accuracies for calculating standard deviation
-    custom_accuracies = []
-    
-    # Iterate through the test set to compare predicted and true labels
-    for i in range(len(test_labels)):
-        true_label = test_labels[i]
-        predicted_label = predicted_labels[i]
-        
-        # Compute the accuracy with the given formula
-        if true_label + predicted_label != 0:  # Avoid division by zero
-            custom_accuracy = (predicted_label - true_label) / (predicted_label + true_label)
-        else:
-            custom_accuracy = 0.0
-        
-        # Append custom accuracy to the list
-        custom_accuracies.append(custom_accuracy)
-        
-        print(f"True label: {true_label}, Predicted label: {predicted_label}, Custom accuracy: {custom_accuracy}")
-    
-    # Convert list to a numpy array for standard deviation calculation
-    custom_accuracies = np.array(custom_accuracies)
-    
-    # Calculate the standard deviation of custom accuracies
-    std_dev = np.std(custom_accuracies)
-    print(f"Standard deviation of custom accuracies: {std_dev}")
-
-# Run the custom evaluation and standard deviation calculation
-evaluate_with_custom_accuracy_and_std(test_images, test_labels)
-
-# Evaluate the model on the test set using standard accuracy
-test_loss, test_acc = model.evaluate(test_images, test_labels, verbose=2)
-print(f"Test accuracy: {test_acc}")
+# Evaluate the model on the test set with a single inference pass (accuracy, custom metric,
+# confusion matrix and off-by-k accuracy), and save the full report
+report = evaluate_model(model, test_images, test_labels, report_file='metrics-report.json')
+print(f"Standard deviation of custom accuracies: {report['custom_std']}")
+print(f"Test accuracy: {report['accuracy']}")
@@ -0,0 +1,197 @@
+import json
+import os
+
+import numpy as np
+import tensorflow as tf
+from keras import callbacks, layers, models, utils
+from feature_store import load_batch, open_feature_store
+from metrics import classification_report
+
+def build_model(input_shape, num_classes=11):
+    """
+    Builds and compiles the spectrogram CNN of cnn-mfcc.py.
+
+    Args:
+        input_shape (tuple): (height, width, channels), e.g. (128, 128, 3) for images, (128, 128, 1) for features.
+        num_classes (int): Number of output classes (0-10 => 11 classes).
+
+    Returns:
+        keras.Model: Compiled model.
+    """
+
+    model = models.Sequential([
+        layers.Input(shape=input_shape),  # Adjusted input shape for 128x128 inputs
+        layers.Conv2D(32, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Conv2D(64, (3, 3), activation='relu'),
+        layers.MaxPooling2D((2, 2)),
+        layers.Conv2D(64, (3, 3), activation='relu'),
+        layers.Flatten(),
+        layers.Dense(64, activation='relu'),
+        layers.Dense(num_classes, activation='softmax')  # Adjust output layer to match the number of classes
+    ])
+
+    # Compile the model
+    model.compile(optimizer='adam',
+                  loss=tf.keras.losses.SparseCategoricalCrossentropy(from_logits=True),
+                  metrics=['accuracy'])
+    return model
+
+class StoreSequence(utils.Sequence):
+    """Feeds model.fit lazily from a memory-mapped store, one batch in memory at a time."""
+
+    def __init__(self, features, labels, indices, batch_size=8, shuffle=True):
+        super().__init__()
+        self.features, self.labels = features, labels
+        self.indices, self.batch_size, self.shuffle = np.array(indices), batch_size, shuffle
+        self.epoch = 0
+
+    def __len__(self):
+        return int(np.ceil(len(self.indices) / self.batch_size))
+
+    def __getitem__(self, i):
+        batch_indices = self.indices[i * self.batch_size:(i + 1) * self.batch_size]
+        return load_batch(self.features, batch_indices), self.labels[batch_indices]
+
+    def on_epoch_end(self):
+        # Reshuffle the sample order between epochs
+        if self.shuffle:
+            self.epoch += 1
+            np.random.default_rng(self.epoch).shuffle(self.indices)
+
+class ResumableEarlyStopping(callbacks.Callback):
+    """
+    Early stopping on val_accuracy whose state survives an interrupted fit.
+
+    The best weights and the patience count are written to the checkpoint folder after every epoch, so a fit
+    resumed by BackupAndRestore carries on counting from where it stopped and ends with the best weights of the
+    whole run, not only of the epochs after the restart. The state file is removed once training ends normally.
+    """
+
+    def __init__(self, checkpoint_dir, patience=8, monitor='val_accuracy'):
+        super().__init__()
+        self.patience, self.monitor = patience, monitor
+        self.state_file = os.path.join(checkpoint_dir, 'early-stopping.json')
+        self.best_weights_file = os.path.join(checkpoint_dir, 'best.weights.h5')
+
+    def on_train_begin(self, logs=None):
+        self.best, self.wait = -np.inf, 0
+        if os.path.exists(self.state_file):
+            with open(self.state_file) as f:
+                state = json.load(f)
+            self.best, self.wait = state['best'], state['wait']
+
+    def on_epoch_end(self, epoch, logs=None):
+        current = (logs or {}).get(self.monitor)
+        if current is None:
+            return
+        if current > self.best:
+            self.best, self.wait = float(current), 0
+            tmp_file = self.best_weights_file.replace('.weights.h5', '.tmp.weights.h5')
+            self.model.save_weights(tmp_file)
+            os.replace(tmp_file, self.best_weights_file)
+        else:
+            self.wait += 1
+            if self.wait >= self.patience:
+                self.model.stop_training = True
+
+        # Written after the weights, so the state never points at weights that were not saved
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({'best': self.best, 'wait': self.wait, 'epoch': epoch}, f)
+        os.replace(tmp_file, self.state_file)
+
+    def on_train_end(self, logs=None):
+        if os.path.exists(self.best_weights_file):
+            self.model.load_weights(self.best_weights_file)
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+
+def training_callbacks(checkpoint_dir=None, patience=8, checkpoint_every=5, steps_per_epoch=None, lr_factor=0.5,
+                       lr_patience=3, min_lr=1e-5):
+    """
+    Callbacks for model.fit: early stopping, learning-rate schedule, checkpoints and resuming.
+
+    With a checkpoint_dir, an interrupted fit called again with the same folder resumes from the last finished
+    epoch: BackupAndRestore restores the weights, optimizer state (including the current learning rate) and
+    epoch counter, and ResumableEarlyStopping its patience count and best weights. ReduceLROnPlateau's own
+    patience count starts over after a restart. The best weights (by val_accuracy) and periodic weight snapshots
+    are kept in the folder.
+
+    Args:
+        checkpoint_dir (str): Folder for checkpoints, or None to train without them.
+        patience (int): Epochs without val_accuracy improvement before stopping (the best weights are restored).
+        checkpoint_every (int): Epochs between periodic weight snapshots (needs steps_per_epoch, otherwise a
+            snapshot is written every epoch).
+        steps_per_epoch (int): Batches per epoch.
+        lr_factor (float): Factor the learning rate is multiplied by when val_loss plateaus.
+        lr_patience (int): Epochs without val_loss improvement before lowering the learning rate.
+        min_lr (float): Lowest learning rate.
+
+    Returns:
+        list: Keras callbacks.
+    """
+
+    training = [callbacks.ReduceLROnPlateau(monitor='val_loss', factor=lr_factor, patience=lr_patience,
+                                            min_lr=min_lr)]
+    if not checkpoint_dir:
+        return training + [callbacks.EarlyStopping(monitor='val_accuracy', mode='max', patience=patience,
+                                                   restore_best_weights=True)]
+
+    os.makedirs(checkpoint_dir, exist_ok=True)
+    save_freq = checkpoint_every * steps_per_epoch if steps_per_epoch else 'epoch'
+    return training + [
+        callbacks.BackupAndRestore(os.path.join(checkpoint_dir, 'backup'), save_freq='epoch'),
+        ResumableEarlyStopping(checkpoint_dir, patience=patience),
+        callbacks.ModelCheckpoint(os.path.join(checkpoint_dir, 'last.weights.h5'), save_weights_only=True,
+                                  save_freq=save_freq),
+    ]
+
+def train_fold(store_dir, train_indices, test_indices, epochs=50, batch_size=8, threads=None, seed=0,
+               checkpoint_dir=None, validation_fraction=0.1):
+    """
+    Trains and evaluates one model on one split of a memory-mapped store (runs in a fold worker process).
+
+    Args:
+        store_dir (str): Store written by feature_store (opened read-only as a memory map, so every fold process
+            shares the same page cache instead of holding its own copy).
+        train_indices (np.ndarray): Training sample indices.
+        test_indices (np.ndarray): Test sample indices.
+        epochs (int): Maximum number of training epochs (early stopping on val_accuracy).
+        batch_size (int): Training batch size.
+        threads (int): TensorFlow intra-op threads for this process (None keeps TensorFlow's default); must be
+            set before TensorFlow runs its first operation in the process.
+        seed (int): Seed of the weight initialisation and of the validation split.
+        checkpoint_dir (str): Checkpoint folder of this fold (resumes an interrupted fold), or None.
+        validation_fraction (float): Part of the training indices held out for early stopping and the
+            learning-rate schedule, so the test split never influences training.
+
+    Returns:
+        dict: metrics.classification_report of the test split plus the per-epoch training history.
+    """
+
+    # 1. Limit this process' share of the CPU
+    if threads:
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+    utils.set_random_seed(seed)
+
+    # 2. Hold out a validation part of the training indices
+    train_indices = np.random.default_rng(seed).permutation(train_indices)
+    n_validation = max(1, int(len(train_indices) * validation_fraction))
+    validation_indices, train_indices = train_indices[:n_validation], train_indices[n_validation:]
+
+    # 3. Train from the shared store
+    features, labels, _ = open_feature_store(store_dir)
+    labels = labels.astype(np.int64)
+    test_inputs, test_labels = load_batch(features, test_indices), labels[test_indices]
+    train_data = StoreSequence(features, labels, train_indices, batch_size=batch_size)
+    model = build_model(test_inputs.shape[1:])
+    history = model.fit(train_data, epochs=epochs, verbose=0,
+                        validation_data=(load_batch(features, validation_indices), labels[validation_indices]),
+                        callbacks=training_callbacks(checkpoint_dir, steps_per_epoch=len(train_data)))
+
+    # 4. Evaluate with a single inference pass
+    report = classification_report(model.predict(test_inputs, verbose=0), test_labels)
+    report['history'] = {key: [float(v) for v in values] for key, values in history.history.items()}
+    return report
@@ -0,0 +1,200 @@
+import os
+import time
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.io.wavfile import write
+from scipy import fft as sp_fft
+from batch_spectral import batch_stft, cached_window
+from collision_engine import BALL_EVENT, FRAME_SECONDS, WALL_EVENT, simulate
+from noise_profile import NoiseProfile
+
+# Modes of the synthetic impact sounds: (frequency range in Hz, decay time range in s) per event type
+IMPACT_MODES = {
+    WALL_EVENT: ((300.0, 1500.0), (0.010, 0.040)),
+    BALL_EVENT: ((2000.0, 6000.0), (0.004, 0.015)),
+}
+
+def modal_impulse_responses(sample_rate, variants=4, modes=3, duration=0.05, seed=0):
+    """
+    Builds a small bank of impact impulse responses, each a sum of exponentially decaying sinusoids.
+
+    Args:
+        sample_rate (int): Sample rate in Hz.
+        variants (int): Number of different responses per event type.
+        modes (int): Number of sinusoids per response.
+        duration (float): Length of each response in seconds.
+        seed (int): Random seed of the mode frequencies and decays.
+
+    Returns:
+        dict: Event type -> (variants, samples) float32 array of peak-normalised responses.
+    """
+
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    responses = {}
+    for kind, ((f_low, f_high), (d_low, d_high)) in IMPACT_MODES.items():
+        frequencies = rng.uniform(f_low, f_high, size=(variants, modes, 1))
+        decays = rng.uniform(d_low, d_high, size=(variants, modes, 1))
+        phases = rng.uniform(0, 2 * np.pi, size=(variants, modes, 1))
+        ir = np.sum(np.exp(-t / decays) * np.sin(2 * np.pi * frequencies * t + phases), axis=1)
+        responses[kind] = (ir / np.max(np.abs(ir), axis=1, keepdims=True)).astype(np.float32)
+    return responses
+
+@lru_cache(maxsize=None)
+def _random_phase_gain(nperseg):
+    """
+    Ratio between a requested magnitude and the mean STFT magnitude of random-phase noise built from it.
+
+    Frames with independent random phases do not form a consistent STFT, so overlap-adding them partly cancels
+    (to about 0.64 of the requested magnitude for a Hann window); the ratio does not depend on the frequency,
+    so it is measured once on a flat spectrum and divided out.
+    """
+
+    flat = np.ones((nperseg // 2 + 1, 1))
+    noise = _random_phase_noise(flat, 200 * nperseg, np.random.default_rng(0), nperseg)
+    magnitude = batch_stft([noise], n_fft=nperseg, convention='scipy')[0]
+    return float(np.mean(magnitude[1:-1, 2:-2]))
+
+def _random_phase_noise(noise_spectrum, n_samples, rng, nperseg):
+    """Overlap-adds frames with the given magnitude and random phases (before the gain correction)."""
+
+    # 1. Random-phase frames, inverted like scipy.signal.istft (Hann window, 50% overlap, 'spectrum' scaling)
+    hop = nperseg // 2
+    frames = n_samples // hop + 2
+    window = cached_window('hann', nperseg)
+    phases = rng.uniform(0, 2 * np.pi, size=(frames, noise_spectrum.shape[0])).astype(np.float32)
+    spectra = noise_spectrum.reshape(-1).astype(np.float32) * np.exp(1j * phases)
+    x = sp_fft.irfft(spectra, nperseg, axis=-1) * (window * window.sum())
+
+    # 2. Overlap-add the halves of consecutive frames and normalise by the summed squared window
+    norm = window[:hop] ** 2 + window[hop:] ** 2
+    noise = ((x[1:, :hop] + x[:-1, hop:]) / norm).ravel()
+    return noise[:n_samples].astype(np.float32)
+
+def noise_from_spectrum(noise_spectrum, n_samples, rng, nperseg=256):
+    """
+    Synthesizes background noise whose average STFT magnitude is the given noise spectrum (random phase).
+
+    Args:
+        noise_spectrum (np.ndarray): (nperseg // 2 + 1, 1) mean magnitude, as in a 'mean' NoiseProfile.
+        n_samples (int): Length of the noise in samples.
+        rng (np.random.Generator): Random generator of the phases.
+        nperseg (int): STFT frame length the spectrum was computed with.
+
+    Returns:
+        np.ndarray: float32 noise in int16 units.
+    """
+
+    return _random_phase_noise(noise_spectrum, n_samples, rng, nperseg) / np.float32(_random_phase_gain(nperseg))
+
+def synthesize_clip(events, duration, sample_rate, responses, noise_spectrum, rng, dt=FRAME_SECONDS, gain=30.0,
+                    nperseg=256):
+    """
+    Renders the collision events of one simulation as audio.
+
+    Each event becomes an impulse scaled by its impact speed, placed at a random instant within its frame, and
+    is convolved with one of the impulse responses of its type (every response variant has its own impulse
+    train; all trains are convolved in one batched FFT); background noise is added on top.
+
+    Args:
+        events (np.ndarray): (E, 3) rows of (time, event type, impact speed) from collision_engine.simulate.
+        duration (float): Length of the clip in seconds.
+        sample_rate (int): Sample rate in Hz.
+        responses (dict): Impulse responses from modal_impulse_responses (same number of variants per type).
+        noise_spectrum (np.ndarray): Mean noise magnitude spectrum, or None for no noise.
+        rng (np.random.Generator): Random generator of the jitter, response choice and noise phases.
+        dt (float): Timestep of the simulation in seconds (the dt passed to simulate).
+        gain (float): Amplitude (int16 units) per unit of impact speed.
+        nperseg (int): STFT frame length of the noise spectrum.
+
+    Returns:
+        np.ndarray: int16 samples.
+    """
+
+    n_samples = int(duration * sample_rate)
+    clip = np.zeros(n_samples, dtype=np.float32)
+
+    # 1. One impulse train per (event type, response variant), all convolved together in the frequency domain
+    onsets = ((events[:, 0] + rng.uniform(0, dt, size=len(events))) * sample_rate).astype(np.int64)
+    kinds = sorted(responses)
+    bank = np.concatenate([responses[kind] for kind in kinds])
+    variant = rng.integers(len(responses[kinds[0]]), size=len(events))
+    row = np.searchsorted(kinds, events[:, 1]) * len(responses[kinds[0]]) + variant
+    inside = onsets < n_samples
+    if inside.any():
+        trains = np.zeros((len(bank), n_samples), dtype=np.float32)
+        np.add.at(trains, (row[inside], onsets[inside]), gain * events[inside, 2])
+        n_fft = sp_fft.next_fast_len(n_samples + bank.shape[1] - 1, real=True)
+        spectrum = np.sum(sp_fft.rfft(trains, n_fft, axis=-1) * sp_fft.rfft(bank, n_fft, axis=-1), axis=0)
+        clip += sp_fft.irfft(spectrum, n_fft)[:n_samples]
+
+    # 2. Background noise with the recorded noise spectrum
+    if noise_spectrum is not None:
+        clip += noise_from_spectrum(noise_spectrum, n_samples, rng, nperseg)
+    return np.clip(np.round(clip), -32768, 32767).astype(np.int16)
+
+def _generate_chunk(tasks, duration, sample_rate, noise_spectrum, nperseg, seed):
+    """Simulates and renders a chunk of clips (runs in a worker process)."""
+    responses = modal_impulse_responses(sample_rate, seed=seed)
+    for wav_file, num_balls, clip_seed in tasks:
+        rng = np.random.default_rng(clip_seed)
+        if num_balls:
+            result = simulate(num_balls=num_balls, elasticity=rng.uniform(0.8, 0.95),
+                              steps=int(duration / FRAME_SECONDS), dt=FRAME_SECONDS, seed=clip_seed,
+                              record_positions=False)
+            events = result['events']
+        else:
+            events = np.zeros((0, 3))  # Label 0: background noise only, like the 0-*.m4a recordings
+        write(wav_file, sample_rate, synthesize_clip(events, duration, sample_rate, responses, noise_spectrum, rng,
+                                                     dt=FRAME_SECONDS, nperseg=nperseg))
+    return len(tasks)
+
+def generate_dataset(output_folder, profile_file='noise-profile.npz', clips_per_label=100, labels=range(0, 11),
+                     duration=3.0, workers=None, chunk_size=32, seed=0):
+    """
+    Generates labeled synthetic clips "<number of balls>-<index>.wav", named like the recordings in data-all.
+
+    Args:
+        output_folder (str): Folder to write the .wav files to.
+        profile_file (str): Noise profile saved by spectral_subtraction.compute_average_noise_spectrum.
+        clips_per_label (int): Number of clips per ball count.
+        labels (range): Ball counts to generate (0 is noise only).
+        duration (float): Length of each clip in seconds.
+        workers (int): Number of worker processes (None uses every CPU core).
+        chunk_size (int): Number of clips per task sent to a worker.
+        seed (int): Base random seed; clip k of label n always gets the same audio.
+
+    Returns:
+        dict: Number of clips written and clips per minute.
+    """
+
+    # 1. Noise spectrum and sample rate come from the recorded noise
+    profile = NoiseProfile.load(profile_file)
+    if profile.kind != 'mean':
+        raise ValueError(f"{profile_file} is a '{profile.kind}' profile, a 'mean' profile is needed")
+    os.makedirs(output_folder, exist_ok=True)
+
+    # 2. One task per clip, grouped into chunks
+    tasks = [(os.path.join(output_folder, f"{n}-{k}.wav"), n, seed * 1_000_003 + n * 100_003 + k)
+             for n in labels for k in range(1, clips_per_label + 1)]
+    chunks = [tasks[i:i + chunk_size] for i in range(0, len(tasks), chunk_size)]
+
+    # 3. Render in parallel
+    start = time.perf_counter()
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_generate_chunk, chunk, duration, profile.sample_rate, profile.mean,
+                               profile.params['nperseg'], seed) for chunk in chunks]
+        for future in futures:
+            written += future.result()
+    elapsed = time.perf_counter() - start
+
+    summary = {'clips': written, 'clips_per_minute': written / elapsed * 60 if elapsed else 0.0}
+    print(f"Wrote {written} clips to {output_folder} ({summary['clips_per_minute']:.0f} clips/min)")
+    return summary
+
+# Usage
+if __name__ == "__main__":
+    generate_dataset("synthetic-data", clips_per_label=200)
@@ -0,0 +1,269 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+
+# Offsets of a cell and its 26 neighbours
+NEIGHBOR_OFFSETS = np.array(list(product((-1, 0, 1), repeat=3)), dtype=np.int64)
+
+# Event types in the events array returned by simulate
+WALL_EVENT, BALL_EVENT = 0, 1
+
+# Simulated seconds per animation frame (interval=50 ms); velocities are in box units per frame of this length
+FRAME_SECONDS = 0.05
+
+# 随时间变化的重力场，基于时间 t 来计算三维重力
+def calculate_gravity(t):
+    # 重力在三个轴上的方向随时间变化
+    angle_x = np.pi * t / 5
+    angle_y = np.pi * t / 3
+    angle_z = np.pi * t / 7
+
+    gravity_x = 500 * np.sin(angle_x)  # x方向重力场随时间变化
+    gravity_y = 500 * np.sin(angle_y)  # y方向重力场随时间变化
+    gravity_z = 9810 * np.sin(angle_z)  # z方向重力场随时间变化
+
+    return np.array([gravity_x, gravity_y, gravity_z])
+
+# Gravity schedules selectable by name in simulate
+GRAVITY_SCHEDULES = {
+    'rotating': calculate_gravity,  # collision-simulation.py
+    'constant': lambda t: np.array([0.0, 0.0, -9810.0]),
+    'none': lambda t: np.zeros(3),
+}
+
+def reflect_walls(positions, velocities, radius, bounds, elasticity):
+    """
+    Bounces every ball off the box walls at once (in place).
+
+    Args:
+        positions (np.ndarray): (N, 3) ball centres.
+        velocities (np.ndarray): (N, 3) ball velocities.
+        radius (float): Ball radius.
+        bounds (np.ndarray): (3, 2) lower and upper wall of each axis.
+        elasticity (float): Fraction of the normal speed kept after a bounce.
+
+    Returns:
+        tuple: (ball index, axis, impact speed) arrays, one entry per wall hit.
+    """
+
+    low = positions - radius < bounds[:, 0]
+    high = positions + radius > bounds[:, 1]
+    hit = low | high
+    balls, axes = np.nonzero(hit)
+    speeds = np.abs(velocities[balls, axes])
+
+    velocities[hit] *= -elasticity
+    # 确保小球不穿透墙壁
+    np.copyto(positions, bounds[:, 0] + radius, where=low)
+    np.copyto(positions, bounds[:, 1] - radius, where=high)
+    return balls, axes, speeds
+
+def candidate_pairs(positions, cell_size):
+    """
+    Finds every pair of balls in the same or adjacent grid cells (a cell list), in about O(N) time.
+
+    Args:
+        positions (np.ndarray): (N, 3) ball centres.
+        cell_size (float): Edge of a grid cell; must be at least the collision distance.
+
+    Returns:
+        tuple: (i, j) index arrays with i < j.
+    """
+
+    # 1. Integer cell of every ball, shifted by one so that neighbour keys never wrap around
+    cells = np.floor(positions / cell_size).astype(np.int64)
+    cells -= cells.min(axis=0) - 1
+    dims = cells.max(axis=0) + 2
+    strides = np.array([dims[1] * dims[2], dims[2], 1])
+    keys = cells @ strides
+
+    # 2. Sort the balls by cell, then look up the range of balls in each of the 27 neighbouring cells
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    neighbor_keys = (keys[:, np.newaxis] + NEIGHBOR_OFFSETS @ strides).ravel()
+    starts = np.searchsorted(sorted_keys, neighbor_keys, side='left')
+    counts = np.searchsorted(sorted_keys, neighbor_keys, side='right') - starts
+
+    # 3. Expand the ranges into pairs without a Python loop
+    i = np.repeat(np.repeat(np.arange(len(positions)), len(NEIGHBOR_OFFSETS)), counts)
+    within = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    j = order[np.repeat(starts, counts) + within]
+    keep = i < j
+    return i[keep], j[keep]
+
+def resolve_collisions(positions, velocities, radius, elasticity, i, j):
+    """
+    Applies the impulses of all touching, approaching ball pairs at once (in place).
+
+    Args:
+        positions (np.ndarray): (N, 3) ball centres.
+        velocities (np.ndarray): (N, 3) ball velocities.
+        radius (float): Ball radius.
+        elasticity (float): Coefficient of restitution.
+        i (np.ndarray): First ball of every candidate pair.
+        j (np.ndarray): Second ball of every candidate pair.
+
+    Returns:
+        tuple: (i, j, impact speed) arrays of the pairs that collided.
+    """
+
+    # 1. Keep the pairs that overlap
+    delta = positions[j] - positions[i]
+    distance = np.linalg.norm(delta, axis=1)
+    touching = (distance < 2 * radius) & (distance > 0)
+    i, j, delta, distance = i[touching], j[touching], delta[touching], distance[touching]
+
+    # 2. Keep the pairs moving towards each other (separating pairs are left alone)
+    normal = delta / distance[:, np.newaxis]
+    velocity_along_normal = np.einsum('ij,ij->i', velocities[i] - velocities[j], normal)
+    approaching = velocity_along_normal > 0
+    i, j, normal, speed = i[approaching], j[approaching], normal[approaching], velocity_along_normal[approaching]
+
+    # 3. Equal masses: each ball takes half of the (1 + e) normal impulse; a ball in several contacts sums them
+    impulse = ((1 + elasticity) * speed / 2)[:, np.newaxis] * normal
+    np.add.at(velocities, i, -impulse)
+    np.add.at(velocities, j, impulse)
+    return i, j, speed
+
+def step(positions, velocities, gravity, radius=1, bounds=((0, 100), (0, 100), (0, 100)), elasticity=0.9,
+         gravity_scale=0.01, dt=FRAME_SECONDS):
+    """
+    Advances the simulation by one timestep (in place), like update() in collision-simulation.py.
+
+    Args:
+        positions (np.ndarray): (N, 3) ball centres.
+        velocities (np.ndarray): (N, 3) ball velocities.
+        gravity (np.ndarray): Gravity vector for this frame.
+        radius (float): Ball radius.
+        bounds (tuple): Lower and upper wall of each axis.
+        elasticity (float): Coefficient of restitution of walls and balls.
+        gravity_scale (float): Velocity change per FRAME_SECONDS per unit of gravity.
+        dt (float): Simulated seconds of this step; the velocity and position updates scale with dt / FRAME_SECONDS.
+
+    Returns:
+        tuple: (wall events, pair events) where wall events are (ball, axis, speed) arrays and pair events are
+            (i, j, speed) arrays.
+    """
+
+    bounds = np.asarray(bounds, dtype=positions.dtype)
+
+    # 1. Integrate (identical to the original per-frame update when dt == FRAME_SECONDS)
+    frames = dt / FRAME_SECONDS
+    velocities += gravity * (gravity_scale * frames)
+    positions += velocities * frames
+
+    # 2. Walls, then ball-ball contacts among neighbours in the grid
+    wall_events = reflect_walls(positions, velocities, radius, bounds, elasticity)
+    i, j = candidate_pairs(positions, 2 * radius)
+    pair_events = resolve_collisions(positions, velocities, radius, elasticity, i, j)
+    return wall_events, pair_events
+
+def simulate(num_balls=5, elasticity=0.9, gravity='rotating', steps=200, dt=FRAME_SECONDS, radius=1,
+             bounds=((0, 100), (0, 100), (0, 100)), seed=0, record_positions=True):
+    """
+    Runs one simulation headless with a fixed timestep, independent of wall-clock time and rendering.
+
+    The same seed gives the same initial conditions as collision-simulation.py (np.random.seed followed by the
+    same two uniform draws), so seed=0 reproduces the animation's starting state.
+
+    Args:
+        num_balls (int): Number of balls.
+        elasticity (float): Coefficient of restitution of walls and balls.
+        gravity (str): Name of a schedule in GRAVITY_SCHEDULES, evaluated at t = step * dt.
+        steps (int): Number of frames to simulate.
+        dt (float): Simulated seconds per step (FRAME_SECONDS matches the animation); a smaller dt is a finer
+            timestep over the same physics, so steps * dt is the simulated duration.
+        radius (float): Ball radius.
+        bounds (tuple): Lower and upper wall of each axis.
+        seed (int): Random seed of the initial positions and velocities.
+        record_positions (bool): Whether to keep the full trajectories.
+
+    Returns:
+        dict: 'positions' (steps, num_balls, 3) float32 trajectories (or None), 'wall_collisions' and
+            'ball_collisions' (steps,) event counts per frame, and 'events' (E, 3) rows of
+            (time in seconds, WALL_EVENT or BALL_EVENT, impact speed).
+    """
+
+    schedule = GRAVITY_SCHEDULES[gravity]
+    bounds = np.asarray(bounds, dtype=np.float64)
+
+    # 1. Initial conditions, drawn like collision-simulation.py
+    rng = np.random.RandomState(seed)
+    positions = rng.uniform(low=bounds[:, 0] + radius, high=bounds[:, 1] - radius, size=(num_balls, 3))
+    velocities = rng.uniform(low=-2, high=2, size=(num_balls, 3))
+
+    # 2. Fixed-timestep loop
+    trajectories = np.empty((steps, num_balls, 3), dtype=np.float32) if record_positions else None
+    wall_collisions = np.zeros(steps, dtype=np.int64)
+    ball_collisions = np.zeros(steps, dtype=np.int64)
+    events = []
+    for k in range(steps):
+        t = k * dt
+        (_, _, wall_speeds), (_, _, ball_speeds) = step(positions, velocities, schedule(t), radius, bounds,
+                                                        elasticity, dt=dt)
+        if record_positions:
+            trajectories[k] = positions
+        wall_collisions[k], ball_collisions[k] = len(wall_speeds), len(ball_speeds)
+        for kind, speeds in ((WALL_EVENT, wall_speeds), (BALL_EVENT, ball_speeds)):
+            if len(speeds):
+                events.append(np.column_stack([np.full(len(speeds), t), np.full(len(speeds), kind), speeds]))
+
+    return {
+        'positions': trajectories,
+        'wall_collisions': wall_collisions,
+        'ball_collisions': ball_collisions,
+        'events': np.concatenate(events) if events else np.zeros((0, 3)),
+    }
+
+def _simulate_config(config):
+    """Runs simulate with one configuration (in a worker process)."""
+    return simulate(**config)
+
+def run_sweep(configs, workers=None):
+    """
+    Runs many independent simulations in parallel worker processes.
+
+    Args:
+        configs (list): Keyword arguments for simulate, one dict per run, e.g.
+            [{'num_balls': n, 'elasticity': e, 'seed': s} for n, e, s in product(range(1, 31), (0.8, 0.9), range(10))].
+        workers (int): Number of worker processes (None uses every CPU core, 1 runs in the current process).
+
+    Returns:
+        list: Result of simulate for every configuration, in order.
+    """
+
+    if workers == 1:
+        return [simulate(**config) for config in configs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_simulate_config, configs))
+
+def benchmark(ball_counts=(30, 1000, 5000), steps=100, radius=1, box=100):
+    """
+    Times the engine for several ball counts and prints the frame rate.
+
+    Args:
+        ball_counts (tuple): Numbers of balls to try.
+        steps (int): Frames simulated for each count.
+        radius (float): Ball radius.
+        box (float): Edge of the cubic box.
+    """
+
+    rng = np.random.default_rng(0)
+    for num_balls in ball_counts:
+        positions = rng.uniform(radius, box - radius, size=(num_balls, 3))
+        velocities = rng.uniform(-2, 2, size=(num_balls, 3))
+        bounds = ((0, box),) * 3
+        collisions = 0
+
+        start = time.perf_counter()
+        for _ in range(steps):
+            _, (i, _, _) = step(positions, velocities, np.zeros(3), radius, bounds)
+            collisions += len(i)
+        elapsed = time.perf_counter() - start
+        print(f"{num_balls:6d} balls: {steps / elapsed:8.1f} frames/s, {collisions} ball-ball collisions")
+
+# Usage
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,120 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.model_selection import StratifiedKFold
+from feature_store import is_store_current, open_feature_store, pack_image_folder
+
+# Same inputs as cnn-mfcc.py: 'png' packs the spectrogram folder into a uint8 store,
+# 'features' uses the store written by transform-features.py
+input_mode = 'png'
+image_folder = 'spectrograms'
+image_store = 'spectrograms-store'
+feature_folder = 'mel-features'
+image_size = (128, 128)
+
+n_splits = 5
+epochs = 50  # Maximum; early stopping on val_accuracy ends most folds sooner
+checkpoint_dir = 'cv-checkpoints'  # Rerun after an interruption to resume the unfinished folds
+parallel_folds = 5  # Folds trained at the same time, one process each
+report_file = 'cross-validation-report.json'
+
+# Metrics aggregated over the folds (mean and std)
+AGGREGATED = ('accuracy', 'custom_mean', 'custom_std')
+
+def _run_fold(args):
+    """Trains one fold (runs in a spawned worker process)."""
+    # Imported here so that TensorFlow is only loaded in the fold processes, never in the parent
+    from cnn_model import train_fold
+    fold, store_dir, train_indices, test_indices, epochs, threads, checkpoint_dir = args
+    fold_dir = os.path.join(checkpoint_dir, f'fold-{fold}') if checkpoint_dir else None
+    report = train_fold(store_dir, train_indices, test_indices, epochs=epochs, threads=threads, seed=fold,
+                        checkpoint_dir=fold_dir)
+    print(f"Fold {fold}: accuracy {report['accuracy']:.3f}, custom std {report['custom_std']:.3f}")
+
+    # Keep the finished fold's report, so a rerun after a crash skips this fold
+    if fold_dir:
+        tmp_file = os.path.join(fold_dir, f'report.json.{os.getpid()}.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(report, f)
+        os.replace(tmp_file, os.path.join(fold_dir, 'report.json'))
+    return report
+
+def _finished_fold(checkpoint_dir, fold):
+    """Report of a fold finished by an earlier run, or None."""
+    report_path = os.path.join(checkpoint_dir, f'fold-{fold}', 'report.json') if checkpoint_dir else None
+    if not report_path or not os.path.exists(report_path):
+        return None
+    with open(report_path) as f:
+        return json.load(f)
+
+def cross_validate(store_dir, n_splits=5, epochs=50, parallel_folds=None, seed=42, checkpoint_dir=None):
+    """
+    Stratified k-fold cross-validation with the folds trained in parallel processes.
+
+    Every process opens the same memory-mapped store and gets an equal share of the CPU cores as TensorFlow
+    intra-op threads, so k folds take about k / parallel_folds times one training run.
+
+    Args:
+        store_dir (str): Store written by feature_store.
+        n_splits (int): Number of folds.
+        epochs (int): Maximum training epochs per fold (early stopping usually ends a fold sooner).
+        parallel_folds (int): Folds trained at once (None trains all folds at once).
+        seed (int): Seed of the fold assignment.
+        checkpoint_dir (str): Folder with one checkpoint sub-folder per fold; rerunning after an interruption
+            reuses the report of every finished fold and resumes the unfinished ones. None trains without
+            checkpoints. Delete the folder to start over (e.g. after changing the data or the model).
+
+    Returns:
+        dict: Per-fold reports and the mean/std of the AGGREGATED metrics and off-by-k accuracies.
+    """
+
+    # 1. Stratified folds over the samples with labels 0-10
+    _, labels, _ = open_feature_store(store_dir)
+    labels = labels.astype(np.int64)
+    indices = np.flatnonzero((labels >= 0) & (labels <= 10))
+    folds = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=seed).split(indices, labels[indices])
+
+    # 2. Skip the folds an earlier run finished, and split the cores between the remaining fold processes
+    reports = {fold: _finished_fold(checkpoint_dir, fold) for fold in range(n_splits)}
+    unfinished = [(fold, train, test) for fold, (train, test) in enumerate(folds) if reports[fold] is None]
+    parallel_folds = max(1, min(parallel_folds or n_splits, len(unfinished)))
+    threads = max(1, (os.cpu_count() or 1) // parallel_folds)
+    tasks = [(fold, store_dir, indices[train], indices[test], epochs, threads, checkpoint_dir)
+             for fold, train, test in unfinished]
+
+    # 3. Train; 'spawn' gives every fold a fresh TensorFlow runtime with its own thread settings
+    if tasks:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=parallel_folds, mp_context=context) as pool:
+            for (fold, *_), report in zip(tasks, pool.map(_run_fold, tasks)):
+                reports[fold] = report
+    reports = [reports[fold] for fold in range(n_splits)]
+
+    # 4. Aggregate
+    summary = {}
+    for key in AGGREGATED:
+        values = np.array([report[key] for report in reports])
+        summary[key] = {'mean': float(values.mean()), 'std': float(values.std())}
+    for k in reports[0]['off_by_k_accuracy']:
+        values = np.array([report['off_by_k_accuracy'][k] for report in reports])
+        summary[f'off_by_{k}_accuracy'] = {'mean': float(values.mean()), 'std': float(values.std())}
+    return {'n_splits': n_splits, 'epochs': epochs, 'summary': summary, 'folds': reports}
+
+# Usage
+if __name__ == "__main__":
+    if input_mode == 'features':
+        store_dir = feature_folder
+    else:
+        # Pack once in the parent; the fold processes only read the memory map
+        if not is_store_current(image_store, image_folder):
+            pack_image_folder(image_folder, image_store, size=image_size, label_range=(0, 10))
+        store_dir = image_store
+
+    results = cross_validate(store_dir, n_splits, epochs, parallel_folds, checkpoint_dir=checkpoint_dir)
+    for key, value in results['summary'].items():
+        print(f"{key}: {value['mean']:.4f} ± {value['std']:.4f}")
+    with open(report_file, 'w') as f:
+        json.dump(results, f, indent=2)
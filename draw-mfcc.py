@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 import random
+from audio_cache import load_audio
 
 # Set global font properties to "Times New Roman" and size 24
 plt.rcParams.update({
@@ -26,7 +27,7 @@ def m4a_to_fft_png(m4a_file, png_file, size=(15, 10)):
     """
 
     # 1. Load the audio file (librosa can handle .m4a with ffmpeg/audioread installed)
-    y, sr = librosa.load(m4a_file)
+    y, sr = load_audio(m4a_file)
 
     # 2. Compute the Short-Time Fourier Transform (STFT)
     S = np.abs(librosa.stft(y, n_fft=2048, hop_length=512))
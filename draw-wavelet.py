@@ -1,10 +1,9 @@
-import librosa
-import librosa.display
 import matplotlib.pyplot as plt
 import numpy as np
 import os
 import random
-import pywt
+from audio_cache import load_audio
+from fast_cwt import cwt_fft
 
 # Set global font properties to "Times New Roman" and size 24
 plt.rcParams.update({
@@ -27,11 +26,11 @@ def m4a_to_wavelet_png(m4a_file, png_file, size=(15, 10)):
     """
 
     # 1. Load the audio file (librosa can handle .m4a with ffmpeg/audioread installed)
-    y, sr = librosa.load(m4a_file)
+    y, sr = load_audio(m4a_file)
 
     # 2. Define scales and perform the continuous wavelet transform (CWT)
     widths = np.arange(1, 128)
-    cwtmatr, freqs = pywt.cwt(y, widths, 'morl', sampling_period=1/sr)
+    cwtmatr, freqs = cwt_fft(y, widths, 'morl', sampling_period=1/sr)  # FFT-based equivalent of pywt.cwt
 
     # 3. Create a figure and axes for plotting
     fig, ax = plt.subplots(figsize=size, dpi=300)  # Adjust figsize for desired output size
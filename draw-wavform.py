@@ -4,6 +4,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 import random
+from audio_cache import load_audio
 
 # Set global font properties to "Times New Roman" and size 24
 plt.rcParams.update({
@@ -26,7 +27,7 @@ def m4a_to_waveform_png(m4a_file, png_file, size=(15, 10)):
     """
 
     # 1. Load the audio file (librosa can handle .m4a with ffmpeg/audioread installed)
-    y, sr = librosa.load(m4a_file)
+    y, sr = load_audio(m4a_file)
 
     # 2. Create a figure and axes for plotting
     fig, ax = plt.subplots(figsize=size, dpi=300)  # Adjust figsize for desired output size
@@ -1,9 +1,10 @@
-import librosa
 import matplotlib.pyplot as plt
 import numpy as np
 import os
 from collections import defaultdict
 from scipy.optimize import curve_fit
+from audio_cache import load_audio
+from frame_energy import calculate_energy  # 向量化的逐帧能量计算（非均方根能量），与原循环版本结果一致
 
 # 设置全局字体为 Times New Roman 和字体大小为 24
 plt.rcParams['font.family'] = 'Times New Roman'
@@ -15,23 +16,13 @@ m4a_folder_path = 'iy-code/data-all'
 # Dictionary to store the energy for each I value
 energy_dict = defaultdict(list)
 
-# Function to calculate the energy of each frame in the audio data (normal energy, not RMS)
-def calculate_energy(wave_data, frame_size):
-    """计算每帧的能量（非均方根能量）"""
-    energy = []
-    for i in range(0, len(wave_data), frame_size):
-        frame = wave_data[i:i + frame_size]
-        e = np.sum(np.square(frame))  # Calculate the energy of each frame
-        energy.append(e)
-    return energy
-
 # Read all M4A files in the folder
 for filename in os.listdir(m4a_folder_path):
     if filename.endswith('.m4a'):
         filepath = os.path.join(m4a_folder_path, filename)
         
         # Load the audio file
-        y, sr = librosa.load(filepath, sr=None)
+        y, sr = load_audio(filepath, sr=None)
 
         # Calculate the energy for each frame
         frame_size = 256  # Frame size for calculating energy
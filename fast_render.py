@@ -0,0 +1,160 @@
+from functools import lru_cache
+
+import matplotlib
+import numpy as np
+from PIL import Image
+
+@lru_cache(maxsize=None)
+def colormap_lut(cmap='magma'):
+    """
+    Builds a 256-entry RGB lookup table for a matplotlib colormap.
+
+    Args:
+        cmap (str): Name of the matplotlib colormap (e.g., 'magma', 'jet').
+
+    Returns:
+        np.ndarray: uint8 array of shape (256, 3).
+    """
+
+    colors = matplotlib.colormaps[cmap](np.linspace(0.0, 1.0, 256))[:, :3]
+    return np.round(colors * 255).astype(np.uint8)
+
+def _resample_axis(a, n, axis, positions=None):
+    """
+    Resamples one axis of a 2D array to n samples.
+
+    Shrinking uses box averaging (every source bin contributes to exactly one output pixel), growing or explicit
+    source positions use linear interpolation.
+
+    Args:
+        a (np.ndarray): 2D array.
+        n (int): Number of output samples along the axis.
+        axis (int): Axis to resample.
+        positions (np.ndarray): Optional fractional source positions to sample at (length n).
+
+    Returns:
+        np.ndarray: The resampled array.
+    """
+
+    m = a.shape[axis]
+    if positions is None and m == n:
+        return a
+    if positions is None and m > n:
+        starts = (np.arange(n) * m) // n
+        counts = np.diff(np.append(starts, m))
+        sums = np.add.reduceat(a, starts, axis=axis)
+        return sums / (counts[:, np.newaxis] if axis == 0 else counts)
+
+    if positions is None:
+        positions = (np.arange(n) + 0.5) * m / n - 0.5
+    positions = np.clip(positions, 0, m - 1)
+    lo = np.floor(positions).astype(int)
+    hi = np.minimum(lo + 1, m - 1)
+    frac = (positions - lo).astype(a.dtype)
+    if axis == 0:
+        return a[lo, :] * (1 - frac)[:, np.newaxis] + a[hi, :] * frac[:, np.newaxis]
+    return a[:, lo] * (1 - frac) + a[:, hi] * frac
+
+def resize_matrix(matrix, size=(128, 128), y_scale='linear'):
+    """
+    Resizes a (rows, columns) feature matrix straight to an exact output size.
+
+    Args:
+        matrix (np.ndarray): 2D array, rows are frequency bins/scales and columns are time frames.
+        size (tuple): Output size (width, height).
+        y_scale (str): 'linear' keeps the rows evenly spaced, 'log' samples them on a logarithmic axis
+            (approximates librosa.display.specshow with y_axis='log').
+
+    Returns:
+        np.ndarray: float32 array of shape (height, width), still ordered with row 0 = first input row.
+    """
+
+    width, height = size
+    matrix = np.asarray(matrix, dtype=np.float32)
+    rows = matrix.shape[0]
+
+    positions = None
+    if y_scale == 'log' and rows > 2:
+        positions = np.geomspace(1, rows - 1, height)
+    matrix = _resample_axis(matrix, height, axis=0, positions=positions)
+    return _resample_axis(matrix, width, axis=1).astype(np.float32, copy=False)
+
+def render_matrix(matrix, size=(128, 128), cmap='magma', vmin=None, vmax=None, y_scale='linear', origin='lower'):
+    """
+    Renders a feature matrix (e.g. a dB spectrogram) to an RGB image without going through a matplotlib figure.
+
+    Args:
+        matrix (np.ndarray): 2D array, rows are frequency bins/scales and columns are time frames.
+        size (tuple): Output size (width, height).
+        cmap (str): Name of the matplotlib colormap.
+        vmin (float): Value mapped to the bottom of the colormap (defaults to the matrix minimum).
+        vmax (float): Value mapped to the top of the colormap (defaults to the matrix maximum).
+        y_scale (str): 'linear' or 'log' frequency axis, see resize_matrix.
+        origin (str): 'lower' puts the first row at the bottom of the image (like specshow),
+            'upper' puts it at the top (like imshow).
+
+    Returns:
+        np.ndarray: uint8 array of shape (height, width, 3).
+    """
+
+    # 1. Colour limits come from the full-resolution data, as matplotlib would pick them
+    vmin = float(np.min(matrix)) if vmin is None else vmin
+    vmax = float(np.max(matrix)) if vmax is None else vmax
+
+    # 2. Resize the numeric matrix, then normalise it to colormap indices
+    resized = resize_matrix(matrix, size, y_scale)
+    scale = 256.0 / (vmax - vmin) if vmax > vmin else 0.0
+    indices = np.clip((resized - vmin) * scale, 0, 255).astype(np.uint8)
+
+    # 3. Orient the image and look up the colours
+    if origin == 'lower':
+        indices = indices[::-1]
+    return colormap_lut(cmap)[indices]
+
+def render_waveform(y, size=(560, 560), color=(31, 119, 180), background=(255, 255, 255)):
+    """
+    Renders a waveform envelope (min/max of the samples under each pixel column, like librosa.display.waveshow)
+    to an RGB image without going through a matplotlib figure.
+
+    Args:
+        y (np.ndarray): Audio samples.
+        size (tuple): Output size (width, height).
+        color (tuple): RGB colour of the waveform (matplotlib's default blue).
+        background (tuple): RGB background colour.
+
+    Returns:
+        np.ndarray: uint8 array of shape (height, width, 3).
+    """
+
+    width, height = size
+    y = np.asarray(y, dtype=np.float32)
+
+    # 1. Envelope of each pixel column
+    starts = (np.arange(width) * len(y)) // width
+    starts = np.minimum(starts, max(len(y) - 1, 0))
+    low = np.minimum.reduceat(y, starts)
+    high = np.maximum.reduceat(y, starts)
+
+    # 2. Map amplitudes to rows, symmetric around zero like waveshow
+    peak = float(np.max(np.abs(y))) or 1.0
+    to_row = lambda v: np.round((1 - (v / peak + 1) / 2) * (height - 1)).astype(int)
+    top, bottom = to_row(high), to_row(low)
+
+    # 3. Fill every pixel between the column's min and max
+    rows = np.arange(height)[:, np.newaxis]
+    mask = (rows >= top) & (rows <= bottom)
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = background
+    image[mask] = color
+    return image
+
+def save_png(image, png_file):
+    """
+    Writes an RGB uint8 image as a .png file.
+
+    Args:
+        image (np.ndarray): uint8 array of shape (height, width, 3).
+        png_file (str): Path to save the .png file.
+    """
+
+    Image.fromarray(image).save(png_file)
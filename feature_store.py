@@ -0,0 +1,240 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import librosa
+import numpy as np
+from PIL import Image
+from audio_cache import load_audio
+from fast_render import render_matrix, resize_matrix
+
+# dB floor used by librosa's power_to_db/amplitude_to_db (top_db=80); features are scaled from [-80, 0] dB to [0, 1]
+TOP_DB = 80.0
+
+def compute_feature(y, sr, kind='mel', size=(128, 128)):
+    """
+    Computes a 1-channel log-frequency feature matrix with the same settings as the transform scripts.
+
+    Args:
+        y (np.ndarray): Audio samples.
+        sr (int): Sample rate.
+        kind (str): 'mel' (transform-mel.py), 'stft' (transform-mfcc.py) or 'cqt' (transform-cqt.py).
+        size (tuple): Output size (width, height).
+
+    Returns:
+        np.ndarray: float32 array of shape (height, width) with values in [0, 1].
+    """
+
+    # 1. Compute the dB matrix (relative to the loudest bin, clipped at -TOP_DB)
+    if kind == 'mel':
+        S_db = librosa.power_to_db(librosa.feature.melspectrogram(y=y, sr=sr, n_mels=128), ref=np.max, top_db=TOP_DB)
+    elif kind == 'stft':
+        S_db = librosa.amplitude_to_db(np.abs(librosa.stft(y, n_fft=2048, hop_length=512)), ref=np.max, top_db=TOP_DB)
+    elif kind == 'cqt':
+        cqt = np.abs(librosa.cqt(y, sr=sr, fmin=librosa.note_to_hz('C1'), n_bins=84))
+        S_db = librosa.amplitude_to_db(cqt, ref=np.max, top_db=TOP_DB)
+    else:
+        raise ValueError(f"Unknown feature kind: {kind}")
+
+    # 2. Resize to the model input size and scale to [0, 1]
+    return np.clip((resize_matrix(S_db, size) + TOP_DB) / TOP_DB, 0.0, 1.0)
+
+def model_input(y, sr, channels=1, size=(128, 128)):
+    """
+    Prepares one clip as a model input, the same way the training data was made.
+
+    Args:
+        y (np.ndarray): Audio samples.
+        sr (int): Sample rate (22050, like audio_cache.load_audio, for models trained on the repo's data).
+        channels (int): 1 for models trained on transform-features.py stores, 3 for models trained on the
+            transform-mel.py spectrogram PNGs.
+        size (tuple): Model input size (width, height).
+
+    Returns:
+        np.ndarray: float32 array of shape (height, width, channels) with values in [0, 1].
+    """
+
+    if channels == 1:
+        return compute_feature(y, sr, 'mel', size)[..., np.newaxis]
+    S_db = librosa.power_to_db(librosa.feature.melspectrogram(y=y, sr=sr, n_mels=128), ref=np.max, top_db=TOP_DB)
+    return render_matrix(S_db, size, cmap='magma').astype(np.float32) / 255.0
+
+def _feature_for_file(args):
+    """Loads one audio file and computes its feature (runs in a worker process)."""
+    path, kind, size = args
+    y, sr = load_audio(path)
+    return compute_feature(y, sr, kind, size)
+
+def write_feature_store(input_folder, store_dir, kind='mel', size=(128, 128), dtype='float16', workers=None):
+    """
+    Computes the feature of every .m4a or .wav file in a folder and packs them into a single memory-mappable array.
+
+    The store folder contains features.npy (N, height, width), labels.npy (N,) taken from the
+    "<label>-<index>.m4a" file names (or "<label>-<index>.wav", as written by collision_audio.generate_dataset),
+    and index.json describing both.
+
+    Args:
+        input_folder (str): Path to the folder containing audio files (.m4a or .wav).
+        store_dir (str): Path of the store folder to create.
+        kind (str): Feature kind, see compute_feature.
+        size (tuple): Feature size (width, height).
+        dtype (str): 'float16' or 'float32'.
+        workers (int): Number of worker processes (None uses every CPU core).
+    """
+
+    # 1. Collect the files and their labels
+    filenames = sorted(f for f in os.listdir(input_folder) if f.endswith((".m4a", ".wav")))
+    labels = np.array([int(f.split('-')[0]) for f in filenames], dtype=np.int16)
+
+    # 2. Allocate the on-disk array
+    os.makedirs(store_dir, exist_ok=True)
+    width, height = size
+    features = np.lib.format.open_memmap(os.path.join(store_dir, "features.npy"), mode='w+',
+                                         dtype=dtype, shape=(len(filenames), height, width))
+
+    # 3. Compute the features in parallel and write them in file order
+    tasks = [(os.path.join(input_folder, f), kind, size) for f in filenames]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for i, feature in enumerate(pool.map(_feature_for_file, tasks, chunksize=8)):
+            features[i] = feature
+            print(f"Processed: {tasks[i][0]} -> {store_dir}[{i}]")
+    features.flush()
+    del features
+
+    # 4. Write the label index
+    np.save(os.path.join(store_dir, "labels.npy"), labels)
+    with open(os.path.join(store_dir, "index.json"), "w") as f:
+        json.dump({"kind": kind, "size": list(size), "dtype": dtype, "files": filenames}, f, indent=2)
+
+def pack_image_folder(image_folder, store_dir, size=(128, 128), label_range=(0, 10)):
+    """
+    Packs a folder of "<label>-<index>.png" spectrogram images into a uint8 store with the same layout as
+    write_feature_store (features.npy of shape (N, height, width, 3), labels.npy and index.json).
+
+    Images are resized and converted to RGB exactly like the loader in cnn-mfcc.py, but stay uint8 on disk
+    (1 byte per value instead of 8 for the float64 arrays the loader used to build).
+
+    Args:
+        image_folder (str): Path to the folder containing .png files.
+        store_dir (str): Path of the store folder to create.
+        size (tuple): Image size (width, height).
+        label_range (tuple): Inclusive (min, max) range of labels to keep.
+    """
+
+    # 1. Collect the files whose label is in range
+    filenames = []
+    for filename in sorted(os.listdir(image_folder)):
+        if filename.endswith('.png') and label_range[0] <= int(filename.split('-')[0]) <= label_range[1]:
+            filenames.append(filename)
+    labels = np.array([int(f.split('-')[0]) for f in filenames], dtype=np.int16)
+
+    # 2. Write the images one by one into the on-disk array
+    os.makedirs(store_dir, exist_ok=True)
+    width, height = size
+    images = np.lib.format.open_memmap(os.path.join(store_dir, "features.npy"), mode='w+',
+                                       dtype=np.uint8, shape=(len(filenames), height, width, 3))
+    for i, filename in enumerate(filenames):
+        with Image.open(os.path.join(image_folder, filename)) as img:
+            images[i] = np.asarray(img.resize(size).convert('RGB'))
+    images.flush()
+    del images
+
+    # 3. Write the label index
+    np.save(os.path.join(store_dir, "labels.npy"), labels)
+    with open(os.path.join(store_dir, "index.json"), "w") as f:
+        json.dump({"kind": "image", "size": list(size), "dtype": "uint8", "label_range": list(label_range),
+                   "files": filenames}, f, indent=2)
+
+def is_store_current(store_dir, source_folder):
+    """
+    Checks whether a store exists and is newer than every file it was built from.
+
+    Args:
+        store_dir (str): Path of the store folder.
+        source_folder (str): Folder the store was built from.
+
+    Returns:
+        bool: True if the store lists the same files and none of them changed after it was written.
+    """
+
+    index_path = os.path.join(store_dir, "index.json")
+    if not os.path.exists(index_path):
+        return False
+    with open(index_path) as f:
+        index = json.load(f)
+    stored = index["files"]
+    low, high = index.get("label_range", (-np.inf, np.inf))
+
+    # 1. Same set of (in-range) source files
+    extension = os.path.splitext(stored[0])[1] if stored else ".png"
+    current = [f for f in os.listdir(source_folder)
+               if f.endswith(extension) and low <= int(f.split('-')[0]) <= high]
+    if sorted(current) != sorted(stored):
+        return False
+
+    # 2. None of them modified after the store was written
+    index_mtime = os.path.getmtime(index_path)
+    return all(os.path.getmtime(os.path.join(source_folder, f)) <= index_mtime for f in stored)
+
+def open_feature_store(store_dir, mmap=True):
+    """
+    Opens a store written by write_feature_store or pack_image_folder.
+
+    Args:
+        store_dir (str): Path of the store folder.
+        mmap (bool): Memory-map the features instead of reading them into memory.
+
+    Returns:
+        tuple: (features (N, height, width) or (N, height, width, 3), labels (N,), index dict)
+    """
+
+    features = np.load(os.path.join(store_dir, "features.npy"), mmap_mode='r' if mmap else None)
+    labels = np.load(os.path.join(store_dir, "labels.npy"))
+    with open(os.path.join(store_dir, "index.json")) as f:
+        index = json.load(f)
+    return features, labels, index
+
+def load_batch(features, indices):
+    """
+    Gathers samples from a store as a float32 model input batch.
+
+    Only the requested rows are read from the memory map. uint8 images are scaled to [0, 1] and
+    (N, height, width) features get a trailing channel axis.
+
+    Args:
+        features (np.ndarray): Array returned by open_feature_store.
+        indices (np.ndarray): Sample indices to gather.
+
+    Returns:
+        np.ndarray: float32 array of shape (len(indices), height, width, channels).
+    """
+
+    batch = np.asarray(features[np.asarray(indices)], dtype=np.float32)
+    if features.dtype == np.uint8:
+        batch /= 255.0
+    if batch.ndim == 3:
+        batch = batch[..., np.newaxis]
+    return batch
+
+def iter_batches(features, labels, indices, batch_size=8, shuffle=True, seed=None):
+    """
+    Lazily yields (inputs, labels) batches from a store, one batch in memory at a time.
+
+    Args:
+        features (np.ndarray): Array returned by open_feature_store.
+        labels (np.ndarray): Labels returned by open_feature_store.
+        indices (np.ndarray): Sample indices to iterate over (e.g. the training split).
+        batch_size (int): Number of samples per batch.
+        shuffle (bool): Shuffle the order of the indices.
+        seed (int): Seed for the shuffle.
+
+    Yields:
+        tuple: (float32 inputs, labels) for each batch.
+    """
+
+    indices = np.array(indices)
+    if shuffle:
+        np.random.default_rng(seed).shuffle(indices)
+    for start in range(0, len(indices), batch_size):
+        batch_indices = indices[start:start + batch_size]
+        yield load_batch(features, batch_indices), labels[batch_indices]
@@ -0,0 +1,128 @@
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+def calculate_energy_loop(wave_data, frame_size):
+    """Reference implementation: energy of each non-overlapping frame, one Python iteration per frame."""
+    energy = []
+    for i in range(0, len(wave_data), frame_size):
+        frame = wave_data[i:i + frame_size]
+        e = np.sum(np.square(frame))  # Calculate the energy of each frame
+        energy.append(e)
+    return energy
+
+def calculate_energy(wave_data, frame_size, hop_size=None, rms=False):
+    """
+    Computes the energy (sum of squares, not RMS by default) of each frame without a per-frame Python loop.
+
+    Frames start every hop_size samples and the last frames are allowed to run past the end of the signal,
+    exactly like calculate_energy_loop. With hop_size == frame_size the values are identical to the loop.
+
+    Args:
+        wave_data (np.ndarray): 1D audio samples.
+        frame_size (int): Number of samples per frame.
+        hop_size (int): Number of samples between frame starts (defaults to frame_size, i.e. no overlap).
+        rms (bool): Return the root-mean-square of each frame instead of its raw energy.
+
+    Returns:
+        np.ndarray: One value per frame.
+    """
+
+    wave_data = np.asarray(wave_data)
+    hop_size = hop_size or frame_size
+    n = len(wave_data)
+    starts = np.arange(0, n, hop_size)
+
+    # 1. Frames that fit completely: a strided view, squared and summed row by row
+    n_full = (n - frame_size) // hop_size + 1 if n >= frame_size else 0
+    energy = np.empty(len(starts), dtype=np.result_type(wave_data.dtype, np.float32))
+    if n_full:
+        frames = sliding_window_view(wave_data, frame_size)[::hop_size][:n_full]
+        energy[:n_full] = np.square(frames).sum(axis=1)
+
+    # 2. The few frames that run past the end of the signal (at most frame_size / hop_size of them)
+    for k in range(n_full, len(starts)):
+        energy[k] = np.sum(np.square(wave_data[starts[k]:]))
+
+    if rms:
+        counts = np.minimum(frame_size, n - starts)
+        energy = np.sqrt(energy / counts)
+    return energy
+
+def calculate_energy_batch(signals, frame_size, hop_size=None, rms=False):
+    """
+    Computes the frame energy of many signals at once with a single segmented sum over all of them.
+
+    Values match calculate_energy up to floating-point rounding.
+
+    Args:
+        signals (list): 1D audio arrays, possibly of different lengths.
+        frame_size (int): Number of samples per frame.
+        hop_size (int): Number of samples between frame starts (defaults to frame_size).
+        rms (bool): Return the root-mean-square of each frame instead of its raw energy.
+
+    Returns:
+        list: One array of frame values per signal.
+    """
+
+    hop_size = hop_size or frame_size
+    lengths = np.array([len(s) for s in signals])
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+    # 1. Frame boundaries of all signals back to back, clipped to the end of their own signal
+    n_frames = -(-lengths // hop_size)
+    file_index = np.repeat(np.arange(len(signals)), n_frames)
+    local_starts = (np.arange(n_frames.sum()) - np.repeat(np.cumsum(n_frames) - n_frames, n_frames)) * hop_size
+    local_ends = np.minimum(local_starts + frame_size, lengths[file_index])
+    squares = np.square(np.concatenate([np.asarray(s) for s in signals]))
+
+    if hop_size == frame_size:
+        # 2a. Non-overlapping frames tile every signal exactly, so one segmented sum does it
+        energy = np.add.reduceat(squares, offsets[file_index] + local_starts)
+    else:
+        # 2b. Overlapping frames: differences of one running sum (taken in float64)
+        cumulative = np.concatenate(([0.0], np.cumsum(squares, dtype=np.float64)))
+        energy = cumulative[offsets[file_index] + local_ends] - cumulative[offsets[file_index] + local_starts]
+
+    if rms:
+        energy = np.sqrt(energy / (local_ends - local_starts))
+    return np.split(energy, np.cumsum(n_frames)[:-1])
+
+def benchmark(duration=30.0, sr=44100, frame_size=256, n_files=20, repeats=3):
+    """
+    Compares the loop, vectorized and batch implementations on random signals and prints the timings.
+
+    Args:
+        duration (float): Length of each test signal in seconds.
+        sr (int): Sample rate of the test signals.
+        frame_size (int): Frame size used by energy.py.
+        n_files (int): Number of signals for the batch comparison.
+        repeats (int): Number of timing repeats (the best one is reported).
+    """
+
+    rng = np.random.default_rng(0)
+    signals = [rng.standard_normal(int(duration * sr) + k * 37).astype(np.float32) * 0.1 for k in range(n_files)]
+
+    def best_time(fn):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+        return min(times), result
+
+    loop_time, loop_result = best_time(lambda: [calculate_energy_loop(s, frame_size) for s in signals])
+    vec_time, vec_result = best_time(lambda: [calculate_energy(s, frame_size) for s in signals])
+    batch_time, batch_result = best_time(lambda: calculate_energy_batch(signals, frame_size))
+
+    exact = all(np.array_equal(np.asarray(a), b) for a, b in zip(loop_result, vec_result))
+    batch_error = max(np.max(np.abs(np.asarray(a, dtype=np.float64) - b)) for a, b in zip(loop_result, batch_result))
+    print(f"{n_files} files x {duration:.0f} s at {sr} Hz, frame_size={frame_size}")
+    print(f"Loop:       {loop_time * 1000:8.1f} ms")
+    print(f"Vectorized: {vec_time * 1000:8.1f} ms ({loop_time / vec_time:.0f}x), identical to loop: {exact}")
+    print(f"Batch:      {batch_time * 1000:8.1f} ms ({loop_time / batch_time:.0f}x), max abs difference: {batch_error:.2e}")
+
+# Usage
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,179 @@
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from keras import models
+from audio_cache import load_audio
+from feature_store import model_input
+
+# Server settings
+model_file = 'cnn-mfcc-export/model.keras'  # Written by model_export.export_model (cnn-mfcc.py)
+host, port = '127.0.0.1', 8500
+max_batch_size = 64  # Largest batch sent to the model at once
+max_wait_ms = 5.0  # How long the first request of a batch waits for others to join it
+
+class MicroBatcher:
+    """
+    Collects inputs from concurrent requests into batches and runs the model on one thread.
+
+    The first input of a batch waits at most max_wait_ms for more inputs, so a single request is answered
+    almost immediately while a burst of requests shares one model call.
+    """
+
+    def __init__(self, model, max_batch_size=64, max_wait_ms=5.0):
+        self.model = model
+        self.max_batch_size, self.max_wait = max_batch_size, max_wait_ms / 1000
+        self.requests = queue.Queue()
+        self.batches = 0
+        self.samples = 0
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def predict(self, inputs):
+        """
+        Queues inputs and waits for their class probabilities.
+
+        Args:
+            inputs (np.ndarray): float32 array of shape (N, height, width, channels).
+
+        Returns:
+            np.ndarray: (N, classes) probabilities.
+        """
+
+        future = Future()
+        self.requests.put((inputs, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            # 1. Block for the first request, then gather more until the batch is full or the wait is over
+            pending = [self.requests.get()]
+            size = len(pending[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                try:
+                    item = self.requests.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                pending.append(item)
+                size += len(item[0])
+
+            # 2. One model call for the whole batch, then hand each request its rows
+            try:
+                probabilities = self.model(np.concatenate([inputs for inputs, _ in pending]), training=False).numpy()
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.samples += size
+            start = 0
+            for inputs, future in pending:
+                future.set_result(probabilities[start:start + len(inputs)])
+                start += len(inputs)
+
+def make_handler(batcher, input_shape):
+    """
+    Builds the HTTP request handler class.
+
+    Endpoints:
+        POST /predict with a JSON body {"paths": [audio files on this machine]} or
+            {"inputs": [model inputs as nested lists]}; answers {"predictions": [...], "probabilities": [...]}.
+        GET /health answers the model input shape and the batching statistics.
+
+    Args:
+        batcher (MicroBatcher): Shared batcher.
+        input_shape (tuple): Model input shape without the batch axis.
+
+    Returns:
+        type: BaseHTTPRequestHandler subclass.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path != "/health":
+                return self._reply(404, {"error": f"Unknown path {self.path}"})
+            self._reply(200, {"input_shape": list(input_shape), "batches": batcher.batches,
+                              "samples": batcher.samples})
+
+        def do_POST(self):
+            if self.path != "/predict":
+                return self._reply(404, {"error": f"Unknown path {self.path}"})
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if not isinstance(request, dict) or not ("paths" in request or "inputs" in request):
+                    raise ValueError('Expected a JSON object with "paths" or "inputs"')
+
+                # 1. Audio files are decoded and turned into features on this handler's thread
+                if "paths" in request:
+                    inputs = np.stack([model_input(*load_audio(path), channels=input_shape[-1],
+                                                   size=(input_shape[1], input_shape[0]))
+                                       for path in request["paths"]])
+                else:
+                    inputs = np.asarray(request["inputs"], dtype=np.float32).reshape((-1,) + tuple(input_shape))
+            except Exception as e:
+                # Malformed JSON, wrong types or shapes, and files that cannot be read or decoded (the audio
+                # backends raise their own exception types) are all the client's error
+                return self._reply(400, {"error": f"{type(e).__name__}: {e}"})
+
+            # 2. Shared, batched model call (a failure of the batch is forwarded to every request in it)
+            try:
+                probabilities = batcher.predict(inputs)
+            except Exception as e:
+                return self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+            self._reply(200, {"predictions": np.argmax(probabilities, axis=1).tolist(),
+                              "probabilities": probabilities.round(6).tolist()})
+
+        def log_message(self, format, *args):
+            pass  # No per-request logging at thousands of requests per minute
+
+    return Handler
+
+class BurstHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer whose listen backlog can hold a burst of concurrent clients."""
+    # The default backlog of 5 makes the kernel reset connections during a burst, which is exactly the traffic the
+    # micro-batcher is meant to merge
+    request_queue_size = 256
+
+def serve(model_file, host='127.0.0.1', port=8500, max_batch_size=64, max_wait_ms=5.0):
+    """
+    Loads the model once and serves predictions over HTTP until interrupted.
+
+    Args:
+        model_file (str): Path of the .keras model.
+        host (str): Address to bind.
+        port (int): Port to bind.
+        max_batch_size (int): Largest batch sent to the model at once.
+        max_wait_ms (float): How long the first request of a batch waits for others.
+    """
+
+    # 1. Load and warm up the model
+    model = models.load_model(model_file)
+    input_shape = model.input_shape[1:]
+    model(np.zeros((1,) + input_shape, dtype=np.float32), training=False)
+
+    # 2. Serve; every request gets its own thread, the model runs on the batcher's thread
+    batcher = MicroBatcher(model, max_batch_size, max_wait_ms)
+    server = BurstHTTPServer((host, port), make_handler(batcher, input_shape))
+    print(f"Serving {model_file} on http://{host}:{port}/predict")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# Usage
+if __name__ == "__main__":
+    serve(model_file, host, port, max_batch_size, max_wait_ms)
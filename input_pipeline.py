@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import tensorflow as tf
+from feature_store import load_batch
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+def folder_dataset(image_folder, filenames, labels, batch_size=8, image_size=(128, 128), training=True,
+                   cache=True, shuffle_buffer=1024, seed=None):
+    """
+    Builds a streaming tf.data pipeline that decodes spectrogram PNGs in parallel.
+
+    Args:
+        image_folder (str): Path to the folder containing the .png files.
+        filenames (list): File names (relative to image_folder) to include.
+        labels (np.ndarray): Label of each file.
+        batch_size (int): Number of samples per batch.
+        image_size (tuple): Model input size (width, height); images of another size are resized.
+        training (bool): Shuffle the samples (use False for evaluation so the order matches labels).
+        cache (bool or str): Cache the decoded images in memory (True) or in a file with this path prefix.
+        shuffle_buffer (int): Size of the shuffle buffer.
+        seed (int): Seed for the shuffle.
+
+    Returns:
+        tf.data.Dataset: Batches of (float32 images in [0, 1] of shape (height, width, 3), labels).
+    """
+
+    width, height = image_size
+    paths = [os.path.join(image_folder, f) for f in filenames]
+
+    def decode(path, label):
+        # Matches PIL's open().resize().convert('RGB') / 255.0 in the eager loader up to rounding: PIL's bicubic
+        # resize filters over the whole source footprint, so downsampling the large matplotlib PNGs (dpi=1300)
+        # needs antialias=True, otherwise only the pixels next to each sample point are used and the result aliases
+        image = tf.io.decode_png(tf.io.read_file(path), channels=3)
+        image = tf.image.resize(image, (height, width), method='bicubic', antialias=True)  # Identity for 128x128
+        image = tf.clip_by_value(image / 255.0, 0.0, 1.0)
+        return tf.ensure_shape(image, (height, width, 3)), label
+
+    dataset = tf.data.Dataset.from_tensor_slices((paths, np.asarray(labels, dtype=np.int64)))
+    dataset = dataset.map(decode, num_parallel_calls=AUTOTUNE)
+    if cache:
+        dataset = dataset.cache() if cache is True else dataset.cache(cache)
+    if training:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(AUTOTUNE)
+
+def store_dataset(features, labels, indices, batch_size=8, training=True, cache=False, shuffle_buffer=1024, seed=None):
+    """
+    Builds a streaming tf.data pipeline over a memory-mapped store from feature_store.
+
+    Indices are shuffled and batched first, then each batch is gathered from the memory map in parallel,
+    so only the rows of the batches in flight are read.
+
+    Args:
+        features (np.ndarray): Array returned by feature_store.open_feature_store.
+        labels (np.ndarray): Labels returned by feature_store.open_feature_store.
+        indices (np.ndarray): Sample indices to include (e.g. the training split).
+        batch_size (int): Number of samples per batch.
+        training (bool): Shuffle the samples (use False for evaluation so the order matches labels).
+        cache (bool or str): Cache the loaded batches in memory (True) or in a file with this path prefix.
+            Leave False for stores larger than RAM.
+        shuffle_buffer (int): Size of the shuffle buffer.
+        seed (int): Seed for the shuffle.
+
+    Returns:
+        tf.data.Dataset: Batches of (float32 inputs of shape (height, width, channels), labels).
+    """
+
+    labels = np.asarray(labels, dtype=np.int64)
+    sample_shape = features.shape[1:] if features.ndim == 4 else features.shape[1:] + (1,)
+
+    def gather(batch_indices):
+        batch_indices = batch_indices.numpy()
+        return load_batch(features, batch_indices), labels[batch_indices]
+
+    def load(batch_indices):
+        inputs, batch_labels = tf.py_function(gather, [batch_indices], (tf.float32, tf.int64))
+        return tf.ensure_shape(inputs, (None,) + sample_shape), tf.ensure_shape(batch_labels, (None,))
+
+    dataset = tf.data.Dataset.from_tensor_slices(np.asarray(indices, dtype=np.int64))
+    if training:
+        dataset = dataset.shuffle(min(shuffle_buffer, len(indices)) or 1, seed=seed, reshuffle_each_iteration=True)
+    dataset = dataset.batch(batch_size).map(load, num_parallel_calls=AUTOTUNE)
+    if cache:
+        # Cached batches keep their first-epoch composition; only the batch order is reshuffled afterwards
+        dataset = dataset.cache() if cache is True else dataset.cache(cache)
+        if training:
+            dataset = dataset.shuffle(64, seed=seed, reshuffle_each_iteration=True)
+    return dataset.prefetch(AUTOTUNE)
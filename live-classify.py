@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+import wave
+from collections import deque
+
+import numpy as np
+from keras import models
+from scipy.signal import resample_poly
+from feature_store import model_input
+from spectral_subtraction import compute_average_noise_spectrum, spectral_subtraction_stream
+
+# Audio source: a .wav file replayed at real-time pace stands in for the microphone
+source_wav = 'live-test.wav'  # 16-bit PCM, mono or stereo
+noise_folder = 'data-all'  # Folder with the "0-*.m4a" noise recordings (see de-noise.py)
+model_file = 'cnn-mfcc-export/model.keras'  # Exported by cnn-mfcc.py
+
+block_size = 1024  # Samples delivered by the source at a time (~23 ms at 44.1 kHz)
+window_seconds = 1.0  # Length of the sliding analysis window
+step_seconds = 0.25  # Time between two decisions
+feature_sr = 22050  # Sample rate the features were computed at (audio_cache.load_audio default)
+image_size = (128, 128)
+latency_target_ms = 100.0
+
+class RingBuffer:
+    """Fixed-size buffer holding the most recent samples, with the capture time of the newest one."""
+
+    def __init__(self, size):
+        self.data = np.zeros(size, dtype=np.float32)
+        self.size, self.written, self.newest_time = size, 0, None
+
+    def write(self, samples, capture_time):
+        samples = samples[-self.size:]
+        start = self.written % self.size
+        first = min(len(samples), self.size - start)
+        self.data[start:start + first] = samples[:first]
+        self.data[:len(samples) - first] = samples[first:]
+        self.written += len(samples)
+        self.newest_time = capture_time
+
+    def latest(self):
+        """Returns the buffer contents in time order (oldest sample first)."""
+        start = self.written % self.size
+        return np.concatenate([self.data[start:], self.data[:start]])
+
+def replay_wav(wav_file, blocks, block_size=1024):
+    """
+    Pushes the samples of a .wav file into a queue at real-time pace, like a microphone callback would.
+
+    Args:
+        wav_file (str): Path to a 16-bit PCM .wav file.
+        blocks (queue.Queue): Receives (int16 mono samples, capture time) tuples, then None at the end.
+        block_size (int): Number of samples per block.
+    """
+
+    with wave.open(wav_file, 'rb') as wav:
+        sample_rate, channels = wav.getframerate(), wav.getnchannels()
+        start = time.perf_counter()
+        sent = 0
+        while True:
+            data = wav.readframes(block_size)
+            if not data:
+                break
+            samples = np.frombuffer(data, dtype='<i2').reshape(-1, channels).mean(axis=1)
+            sent += len(samples)
+            # A real source only has the block once its last sample was recorded
+            time.sleep(max(0.0, start + sent / sample_rate - time.perf_counter()))
+            blocks.put((samples, time.perf_counter()))
+    blocks.put(None)
+
+def window_to_input(window, sample_rate, channels):
+    """
+    Turns a window of denoised samples into one model input, prepared like the training data.
+
+    Args:
+        window (np.ndarray): Audio samples at sample_rate.
+        sample_rate (int): Sample rate of the window.
+        channels (int): Channels of the model input: 1 for feature-store models, 3 for spectrogram PNG models.
+
+    Returns:
+        np.ndarray: float32 array of shape (1, height, width, channels).
+    """
+
+    # 1. Resample to the rate the training audio was loaded at
+    y = resample_poly(window, feature_sr, sample_rate).astype(np.float32) / 32768.0
+
+    # 2. Same feature as transform-features.py, or the same image as transform-mel.py
+    return model_input(y, feature_sr, channels, image_size)[np.newaxis]
+
+def run_live(wav_file, noise_spectrum, model):
+    """
+    Denoises the incoming audio block by block, and every step_seconds classifies the last window_seconds.
+
+    Latency is measured from the capture of the newest sample in the window to the model's decision.
+
+    Args:
+        wav_file (str): Path to the .wav file to replay as the live source.
+        noise_spectrum (np.ndarray): Average noise spectrum from compute_average_noise_spectrum.
+        model (keras.Model): Trained classifier.
+
+    Returns:
+        np.ndarray: Per-window latencies in milliseconds.
+    """
+
+    with wave.open(wav_file, 'rb') as wav:
+        sample_rate = wav.getframerate()
+    channels = model.input_shape[-1]
+    ring = RingBuffer(int(window_seconds * sample_rate))
+    step = int(step_seconds * sample_rate)
+
+    # 1. Start the source; the consumer below pulls blocks from the queue as they arrive
+    blocks = queue.Queue()
+    threading.Thread(target=replay_wav, args=(wav_file, blocks, block_size), daemon=True).start()
+    capture_times = deque(maxlen=1)  # Only the capture time of the newest block is needed
+
+    def incoming():
+        while (item := blocks.get()) is not None:
+            samples, capture_time = item
+            capture_times.append(capture_time)
+            yield samples
+
+    # 2. Denoise continuously and decide once per step
+    latencies = []
+    next_decision = ring.size
+    for clean in spectral_subtraction_stream(incoming(), noise_spectrum):
+        ring.write(clean, capture_times[-1])
+        if ring.written < next_decision:
+            continue
+        next_decision = ring.written + step
+
+        feature_start = time.perf_counter()
+        x = window_to_input(ring.latest(), sample_rate, channels)
+        model_start = time.perf_counter()
+        probabilities = model(x, training=False).numpy()[0]
+        decided = time.perf_counter()
+
+        latency = (decided - ring.newest_time) * 1000
+        latencies.append(latency)
+        print(f"t={ring.written / sample_rate:6.2f} s  predicted {np.argmax(probabilities):2d} "
+              f"(p={np.max(probabilities):.2f})  latency {latency:6.1f} ms "
+              f"(feature {(model_start - feature_start) * 1000:.1f} ms, model {(decided - model_start) * 1000:.1f} ms)")
+
+    # 3. Latency summary
+    latencies = np.array(latencies)
+    if len(latencies):
+        p50, p95 = np.percentile(latencies, [50, 95])
+        print(f"{len(latencies)} windows: latency p50 {p50:.1f} ms, p95 {p95:.1f} ms, max {latencies.max():.1f} ms, "
+              f"{np.mean(latencies < latency_target_ms):.0%} under {latency_target_ms:.0f} ms")
+    return latencies
+
+# Usage
+if __name__ == "__main__":
+    noise_spectrum = compute_average_noise_spectrum(noise_folder)
+    model = models.load_model(model_file)
+    model(np.zeros((1, *model.input_shape[1:]), dtype=np.float32))  # Warm up before the clock starts
+    run_live(source_wav, noise_spectrum, model)
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+
+MANIFEST_NAME = ".manifest.json"
+
+def file_digest(path, block_size=1 << 20):
+    """
+    Computes the SHA-1 digest of a file's contents.
+
+    Args:
+        path (str): Path to the file.
+        block_size (int): Number of bytes read at a time.
+
+    Returns:
+        str: Hex digest.
+    """
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_key(path, *params):
+    """
+    Builds a hex digest that identifies a source file in its current state together with the decode parameters.
+
+    Args:
+        path (str): Path to the source file.
+        *params: Decode parameters that change the cached result (e.g. sample rate, mono flag).
+
+    Returns:
+        str: SHA-1 digest of the absolute path, size, mtime and parameters.
+    """
+
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns) + tuple(params)
+    return hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+
+def params_key(convert, convert_kwargs):
+    """
+    Describes a conversion (function name and keyword arguments) as a canonical string.
+
+    Args:
+        convert (callable): The conversion function.
+        convert_kwargs (dict): Its keyword arguments.
+
+    Returns:
+        str: JSON string that changes whenever the transform or its parameters change.
+    """
+
+    return json.dumps({"convert": convert.__name__, **convert_kwargs}, sort_keys=True, default=str)
+
+class Manifest:
+    """
+    Record of the inputs an output folder was built from, stored as .manifest.json inside that folder.
+
+    Each entry maps an input file name to its size, mtime, content hash, the transform parameters and the
+    output files it produced, so a rerun only converts new or changed inputs (or everything if the
+    parameters changed).
+    """
+
+    def __init__(self, output_folder):
+        self.path = os.path.join(output_folder, MANIFEST_NAME)
+        self.entries = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.entries = json.load(f)
+
+    def is_current(self, input_path, params):
+        """
+        Checks whether an input was already converted with these parameters and its outputs still exist.
+
+        The content hash is only computed when the size matches but the mtime changed (e.g. a copied or
+        touched file), so unchanged inputs cost a single stat.
+
+        Args:
+            input_path (str): Path to the input file.
+            params (str): Result of params_key for the current run.
+
+        Returns:
+            bool: True if the input can be skipped.
+        """
+
+        entry = self.entries.get(os.path.basename(input_path))
+        if entry is None or entry["params"] != params:
+            return False
+        if not all(os.path.exists(output) for output in entry["outputs"]):
+            return False
+
+        stat = os.stat(input_path)
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns != entry["mtime_ns"]:
+            if file_digest(input_path) != entry["hash"]:
+                return False
+            entry["mtime_ns"] = stat.st_mtime_ns
+        return True
+
+    def record(self, input_path, params, outputs, digest):
+        """
+        Records a successful conversion.
+
+        Args:
+            input_path (str): Path to the input file.
+            params (str): Result of params_key for the current run.
+            outputs (list): Paths of the files the conversion wrote.
+            digest (str): Content hash of the input file.
+        """
+
+        stat = os.stat(input_path)
+        self.entries[os.path.basename(input_path)] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": digest,
+            "params": params,
+            "outputs": list(outputs),
+        }
+
+    def save(self):
+        """Writes the manifest atomically, so an interrupted run leaves a valid file behind."""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,102 @@
+import json
+
+import numpy as np
+
+def custom_relative_error(predicted, true):
+    """
+    The (predicted - true) / (predicted + true) metric of cnn-mfcc.py, for every sample at once.
+
+    Args:
+        predicted (np.ndarray): Predicted labels.
+        true (np.ndarray): True labels.
+
+    Returns:
+        np.ndarray: float64 metric per sample (0 where both labels are 0).
+    """
+
+    predicted, true = np.asarray(predicted, dtype=np.int64), np.asarray(true, dtype=np.int64)
+    total = predicted + true
+    return np.where(total != 0, (predicted - true) / np.maximum(total, 1), 0.0)
+
+def confusion_matrix(true, predicted, num_classes=11):
+    """
+    Counts (true, predicted) label pairs.
+
+    Args:
+        true (np.ndarray): True labels.
+        predicted (np.ndarray): Predicted labels.
+        num_classes (int): Number of classes.
+
+    Returns:
+        np.ndarray: int64 array of shape (num_classes, num_classes); rows are true labels.
+    """
+
+    pairs = np.asarray(true, dtype=np.int64) * num_classes + np.asarray(predicted, dtype=np.int64)
+    return np.bincount(pairs, minlength=num_classes ** 2).reshape(num_classes, num_classes)
+
+def off_by_k_accuracy(true, predicted, k_values=(0, 1, 2)):
+    """
+    Fraction of samples whose predicted count is within k of the true count.
+
+    Args:
+        true (np.ndarray): True labels.
+        predicted (np.ndarray): Predicted labels.
+        k_values (tuple): Tolerances to report.
+
+    Returns:
+        dict: k -> accuracy.
+    """
+
+    error = np.abs(np.asarray(predicted, dtype=np.int64) - np.asarray(true, dtype=np.int64))
+    return {k: float(np.mean(error <= k)) for k in k_values}
+
+def classification_report(probabilities, labels, num_classes=11):
+    """
+    Every metric of the report, computed from one set of model outputs.
+
+    Args:
+        probabilities (np.ndarray): (N, num_classes) model outputs.
+        labels (np.ndarray): True labels.
+        num_classes (int): Number of classes.
+
+    Returns:
+        dict: accuracy, custom metric mean/std, off-by-k accuracy, per-class recall and the confusion matrix.
+    """
+
+    labels = np.asarray(labels, dtype=np.int64)
+    predicted = np.argmax(probabilities, axis=1)
+    custom = custom_relative_error(predicted, labels)
+    confusion = confusion_matrix(labels, predicted, num_classes)
+    support = confusion.sum(axis=1)
+    return {
+        'samples': int(len(labels)),
+        'accuracy': float(np.mean(predicted == labels)),
+        'custom_mean': float(np.mean(custom)),
+        'custom_std': float(np.std(custom)),
+        'off_by_k_accuracy': {str(k): v for k, v in off_by_k_accuracy(labels, predicted).items()},
+        'per_class_recall': [float(c / s) if s else None for c, s in zip(np.diag(confusion), support)],
+        'confusion_matrix': confusion.tolist(),
+    }
+
+def evaluate_model(model, inputs, labels, batch_size=64, num_classes=11, report_file=None):
+    """
+    Evaluates a model with a single batched inference pass and optionally writes a JSON report.
+
+    Args:
+        model (keras.Model): Trained model.
+        inputs (np.ndarray or tf.data.Dataset): Test inputs.
+        labels (np.ndarray): True labels, in the order of inputs.
+        batch_size (int): Batch size of the predict call.
+        num_classes (int): Number of classes.
+        report_file (str): Path of the JSON report, or None.
+
+    Returns:
+        dict: Report from classification_report.
+    """
+
+    probabilities = model.predict(inputs, batch_size=batch_size, verbose=0)
+    report = classification_report(probabilities, labels, num_classes)
+    if report_file:
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
@@ -0,0 +1,117 @@
+import os
+
+import numpy as np
+import tensorflow as tf
+
+# File names inside an export folder
+SAVED_MODEL_DIR = "saved_model"
+KERAS_FILE = "model.keras"
+TFLITE_FILES = {"float32": "model.tflite", "float16": "model_float16.tflite", "int8": "model_int8.tflite"}
+
+def representative_dataset(inputs, samples=100, seed=0):
+    """
+    Builds the calibration generator the TFLite converter uses to choose int8 activation ranges.
+
+    Args:
+        inputs (np.ndarray): Model inputs (N, height, width, channels), e.g. from feature_store.load_batch.
+        samples (int): Number of inputs to calibrate on.
+        seed (int): Seed used to pick the inputs.
+
+    Returns:
+        callable: Generator function yielding one-sample input lists.
+    """
+
+    chosen = np.random.default_rng(seed).permutation(len(inputs))[:samples]
+
+    def generator():
+        for i in chosen:
+            yield [np.asarray(inputs[i:i + 1], dtype=np.float32)]
+    return generator
+
+def calibration_indices(train_indices, samples=200, seed=0):
+    """
+    Picks the training samples the int8 export is calibrated on (never test samples).
+
+    cnn-mfcc.py and quantize-cnn.py both call this on the same outer training split, so the int8 models they
+    write are calibrated on the same inputs.
+
+    Args:
+        train_indices (np.ndarray): Sample indices of the training split.
+        samples (int): Number of calibration samples.
+        seed (int): Seed used to pick the samples.
+
+    Returns:
+        np.ndarray: Sorted sample indices.
+    """
+
+    samples = min(samples, len(train_indices))
+    return np.sort(np.random.default_rng(seed).choice(train_indices, samples, replace=False))
+
+def convert_tflite(saved_model_dir, tflite_file, mode="float32", representative_inputs=None):
+    """
+    Converts a SavedModel to a TFLite flatbuffer.
+
+    Args:
+        saved_model_dir (str): Path of the SavedModel.
+        tflite_file (str): Path of the .tflite file to write.
+        mode (str): 'float32', 'float16' (float16 weights) or 'int8' (int8 weights and activations, int8 input
+            and output; needs representative_inputs).
+        representative_inputs (np.ndarray): Calibration inputs for 'int8'.
+
+    Returns:
+        int: Size of the written file in bytes.
+    """
+
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model_dir)
+    if mode == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == "int8":
+        if representative_inputs is None:
+            raise ValueError("int8 conversion needs representative_inputs")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(representative_inputs)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    elif mode != "float32":
+        raise ValueError(f"Unknown TFLite mode: {mode}")
+
+    flatbuffer = converter.convert()
+    with open(tflite_file, "wb") as f:
+        f.write(flatbuffer)
+    return len(flatbuffer)
+
+def export_model(model, export_dir, representative_inputs=None, tflite_modes=("float32", "int8")):
+    """
+    Saves a trained model once in every deployable format.
+
+    The export folder contains saved_model/ (TensorFlow Serving / tf.saved_model.load), model.keras
+    (keras.models.load_model, used by live-classify.py and inference_server.py) and one .tflite file per mode.
+
+    Args:
+        model (keras.Model): Trained model.
+        export_dir (str): Folder to write to.
+        representative_inputs (np.ndarray): Calibration inputs, needed for the 'int8' variant.
+        tflite_modes (tuple): TFLite variants to write, see convert_tflite.
+
+    Returns:
+        dict: Format -> path of every written file.
+    """
+
+    os.makedirs(export_dir, exist_ok=True)
+    paths = {"keras": os.path.join(export_dir, KERAS_FILE), "saved_model": os.path.join(export_dir, SAVED_MODEL_DIR)}
+
+    # 1. Keras file and SavedModel
+    model.save(paths["keras"])
+    model.export(paths["saved_model"])
+
+    # 2. TFLite variants converted from the SavedModel
+    for mode in tflite_modes:
+        if mode == "int8" and representative_inputs is None:
+            print("Skipping the int8 TFLite model: no representative inputs")
+            continue
+        paths[mode] = os.path.join(export_dir, TFLITE_FILES[mode])
+        size = convert_tflite(paths["saved_model"], paths[mode], mode, representative_inputs)
+        print(f"Exported {paths[mode]} ({size / 1024:.0f} KiB)")
+    return paths
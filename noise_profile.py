@@ -0,0 +1,200 @@
+import json
+import os
+
+import numpy as np
+from audio_cache import load_audio
+from batch_spectral import batch_stft
+from pcm_stream import decode_pcm
+
+class NoiseProfile:
+    """
+    Running mean and variance of the noise spectrum over a set of noise recordings, saved as a .npz file.
+
+    Two kinds of spectrum are supported:
+        'mean': time-averaged scipy STFT magnitude of the int16 samples, shape (nperseg // 2 + 1, 1)
+            (the spectrum de-noise.py subtracts).
+        'frames': librosa STFT magnitude, shape (n_fft // 2 + 1, frames), truncated to the shortest
+            recording (the spectrogram spectrum-noise.py plots).
+
+    Spectra are computed in batches (batch_spectral.batch_stft) and folded into the statistics with Welford's
+    algorithm, so every recording is decoded once, and the file names, sizes and mtimes already included are
+    recorded so later runs only decode new recordings.
+    """
+
+    def __init__(self, kind='mean', nperseg=256, n_fft=1024, hop_length=512):
+        if kind not in ('mean', 'frames'):
+            raise ValueError(f"Unknown noise profile kind: {kind}")
+        self.kind = kind
+        self.params = {'nperseg': nperseg} if kind == 'mean' else {'n_fft': n_fft, 'hop_length': hop_length}
+        self.sample_rate = None
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+        self.sources = {}
+
+    @property
+    def variance(self):
+        """Population variance of each spectrum bin."""
+        return self.m2 / self.count if self.count else None
+
+    @property
+    def std(self):
+        """Standard deviation of each spectrum bin."""
+        return np.sqrt(self.variance) if self.count else None
+
+    def update(self, spectrum):
+        """
+        Adds one recording's spectrum to the running statistics (Welford's algorithm).
+
+        Args:
+            spectrum (np.ndarray): Spectrum with the shape described in the class docstring.
+        """
+
+        spectrum = np.asarray(spectrum, dtype=np.float64)
+        if self.mean is None:
+            self.mean, self.m2 = spectrum.copy(), np.zeros_like(spectrum)
+        else:
+            # Keep only the frames every recording has (each bin's statistics are independent)
+            frames = min(self.mean.shape[1], spectrum.shape[1])
+            self.mean, self.m2, spectrum = self.mean[:, :frames], self.m2[:, :frames], spectrum[:, :frames]
+        self.count += 1
+        delta = spectrum - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (spectrum - self.mean)
+
+    def decode(self, path):
+        """
+        Decodes a noise recording the way this profile's kind expects it.
+
+        Args:
+            path (str): Path to the audio file.
+
+        Returns:
+            tuple: (samples, sample rate)
+        """
+
+        if self.kind == 'mean':
+            # int16 samples at the native rate, as de-noise.py reads them
+            return decode_pcm(path)
+        return load_audio(path, sr=None)
+
+    def spectra(self, signals):
+        """
+        Spectra of several recordings, computed together with batch_spectral.batch_stft.
+
+        Args:
+            signals (list): Decoded recordings.
+
+        Returns:
+            list: Spectrum of every recording, see the class docstring for the shapes.
+        """
+
+        if self.kind == 'mean':
+            magnitudes = batch_stft(signals, n_fft=self.params['nperseg'], convention='scipy')
+            return [np.mean(magnitude, axis=1, keepdims=True) for magnitude in magnitudes]
+        return batch_stft(signals, n_fft=self.params['n_fft'], hop_length=self.params['hop_length'])
+
+    def update_from_files(self, paths):
+        """
+        Adds every recording that is not yet part of the profile.
+
+        If a recording already in the profile was modified or removed, its old contribution cannot be taken
+        out again, so the profile is rebuilt from the given files.
+
+        Args:
+            paths (list): Paths to the noise recordings.
+
+        Returns:
+            int: Number of recordings decoded.
+        """
+
+        # 1. Check the recordings already in the profile
+        stats = {os.path.basename(p): os.stat(p) for p in paths}
+        stale = [name for name, source in self.sources.items()
+                 if name not in stats or [stats[name].st_size, stats[name].st_mtime_ns] != source]
+        if stale:
+            print(f"Noise recordings changed or removed ({', '.join(sorted(stale))}), rebuilding the profile")
+            self.count, self.mean, self.m2, self.sources = 0, None, None, {}
+
+        # 2. Decode only the new ones
+        new_paths = [path for path in paths if os.path.basename(path) not in self.sources]
+        signals = []
+        for path in new_paths:
+            print(f"处理噪声文件: {path}")
+            samples, sample_rate = self.decode(path)
+            if self.sample_rate is None:
+                self.sample_rate = sample_rate
+            elif sample_rate != self.sample_rate:
+                raise ValueError(f"{path} is sampled at {sample_rate} Hz, the profile at {self.sample_rate} Hz")
+            signals.append(samples)
+
+        # 3. Transform them in batches and fold them into the running statistics
+        for path, spectrum in zip(new_paths, self.spectra(signals)):
+            self.update(spectrum)
+            name = os.path.basename(path)
+            self.sources[name] = [stats[name].st_size, stats[name].st_mtime_ns]
+        return len(new_paths)
+
+    def matches(self, kind, **params):
+        """Checks whether the profile was computed with this kind and STFT parameters."""
+        return self.kind == kind and all(self.params.get(k) == v for k, v in params.items())
+
+    def save(self, path):
+        """
+        Writes the profile atomically to a .npz file.
+
+        Args:
+            path (str): Path of the .npz file.
+        """
+
+        meta = {'kind': self.kind, 'params': self.params, 'sample_rate': self.sample_rate, 'count': self.count,
+                'sources': self.sources}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, mean=self.mean, m2=self.m2, meta=json.dumps(meta))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a profile written by save.
+
+        Args:
+            path (str): Path of the .npz file.
+
+        Returns:
+            NoiseProfile: The loaded profile.
+        """
+
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            profile = cls(meta['kind'], **meta['params'])
+            profile.sample_rate, profile.count, profile.sources = meta['sample_rate'], meta['count'], meta['sources']
+            if profile.count:
+                profile.mean, profile.m2 = data['mean'], data['m2']
+        return profile
+
+def load_noise_profile(profile_file, paths, kind='mean', **params):
+    """
+    Loads a saved noise profile, adds any new recordings and saves it back.
+
+    Args:
+        profile_file (str): Path of the .npz file (created if missing or computed with other parameters).
+        paths (list): Paths to all noise recordings.
+        kind (str): 'mean' or 'frames', see NoiseProfile.
+        **params: STFT parameters of the profile (nperseg, or n_fft and hop_length).
+
+    Returns:
+        NoiseProfile: The up-to-date profile.
+    """
+
+    profile = None
+    if os.path.exists(profile_file):
+        profile = NoiseProfile.load(profile_file)
+        if not profile.matches(kind, **params):
+            profile = None
+    if profile is None:
+        profile = NoiseProfile(kind, **params)
+    if profile.update_from_files(paths):
+        profile.save(profile_file)
+    return profile
@@ -0,0 +1,103 @@
+import glob
+import json
+import os
+import subprocess
+
+import numpy as np
+from manifest import cache_key
+
+def probe_audio(path):
+    """
+    Reads the native sample rate and channel count of an audio file with ffprobe.
+
+    Args:
+        path (str): Path to the audio file.
+
+    Returns:
+        tuple: (sample rate, number of channels)
+    """
+
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a:0", "-show_entries", "stream=sample_rate,channels",
+         "-of", "json", path],
+        check=True, capture_output=True, text=True)
+    stream = json.loads(result.stdout)["streams"][0]
+    return int(stream["sample_rate"]), int(stream["channels"])
+
+def iter_pcm_blocks(path, block_size=65536, sample_rate=None, channels=1):
+    """
+    Decodes an audio file with ffmpeg and yields it as int16 blocks, without ever holding the whole file.
+
+    Args:
+        path (str): Path to the audio file (.m4a, .wav, ...).
+        block_size (int): Number of samples (per channel) in each block; the last block may be shorter.
+        sample_rate (int): Resample to this rate, or None to keep the native rate.
+        channels (int): Number of output channels (1 downmixes to mono), or None to keep the native layout.
+
+    Yields:
+        np.ndarray: int16 array of shape (block_size,) for mono or (block_size, channels).
+    """
+
+    cmd = ["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-acodec", "pcm_s16le"]
+    if channels:
+        cmd += ["-ac", str(channels)]
+    if sample_rate:
+        cmd += ["-ar", str(sample_rate)]
+    cmd.append("-")
+    n_channels = channels or probe_audio(path)[1]
+
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    finished = False
+    try:
+        while True:
+            data = process.stdout.read(block_size * n_channels * 2)
+            if not data:
+                finished = True
+                break
+            block = np.frombuffer(data, dtype="<i2")
+            yield block if n_channels == 1 else block.reshape(-1, n_channels)
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode(errors="replace")
+        process.stderr.close()
+        # A consumer that stops early closes the pipe, so ffmpeg exits with a broken-pipe error: not a failure
+        if process.wait() != 0 and finished:
+            raise RuntimeError(f"ffmpeg failed on {path}: {stderr.strip()}")
+
+def decode_pcm(path, sample_rate=None, channels=1, cache_dir=None):
+    """
+    Decodes a whole audio file to int16 samples in memory through an ffmpeg pipe (no intermediate .wav file).
+
+    Args:
+        path (str): Path to the audio file (.m4a, .wav, ...).
+        sample_rate (int): Resample to this rate, or None to keep the native rate.
+        channels (int): Number of output channels (1 downmixes to mono), or None to keep the native layout.
+        cache_dir (str): If given, the int16 samples are kept there as .npy files (keyed like audio_cache), so
+            later runs skip ffmpeg entirely.
+
+    Returns:
+        tuple: (int16 samples, sample rate)
+    """
+
+    # 1. Cache hit: the sample rate is part of the file name
+    if cache_dir:
+        key = cache_key(path, "pcm", sample_rate, channels)
+        hits = glob.glob(os.path.join(cache_dir, key + "-*.npy"))
+        if hits:
+            cached_sr = int(os.path.splitext(os.path.basename(hits[0]))[0].rsplit("-", 1)[1])
+            return np.load(hits[0]), cached_sr
+
+    # 2. Decode through the pipe
+    sample_rate = sample_rate or probe_audio(path)[0]
+    blocks = list(iter_pcm_blocks(path, block_size=1 << 20, sample_rate=sample_rate, channels=channels))
+    samples = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.int16)
+
+    # 3. Write the cache atomically
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_file = os.path.join(cache_dir, f"{key}-{sample_rate}.npy")
+        tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            np.save(f, samples)
+        os.replace(tmp_file, cache_file)
+    return samples, sample_rate
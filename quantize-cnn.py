@@ -0,0 +1,110 @@
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+from sklearn.model_selection import train_test_split
+from feature_store import is_store_current, load_batch, open_feature_store, pack_image_folder
+from metrics import classification_report
+from model_export import SAVED_MODEL_DIR, TFLITE_FILES, calibration_indices, convert_tflite
+
+# Same data and split as cnn-mfcc.py
+image_folder = 'spectrograms'
+image_store = 'spectrograms-store'
+image_size = (128, 128)
+export_dir = 'cnn-mfcc-export'  # Written by cnn-mfcc.py
+report_file = 'quantization-report.json'
+
+calibration_samples = 200  # Training spectrograms used to calibrate the int8 activation ranges
+num_threads = 1  # Interpreter threads (the Raspberry Pi runs one inference at a time)
+
+def run_tflite(tflite_file, inputs, num_threads=1):
+    """
+    Runs a TFLite model on every input one at a time, as a deployed classifier would, and times each call.
+
+    Args:
+        tflite_file (str): Path of the .tflite model.
+        inputs (np.ndarray): float32 inputs (N, height, width, channels).
+        num_threads (int): Interpreter threads.
+
+    Returns:
+        tuple: (probabilities (N, classes) as float32, per-sample latencies in milliseconds)
+    """
+
+    interpreter = tf.lite.Interpreter(model_path=tflite_file, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+    input_scale, input_zero = input_detail['quantization']
+    output_scale, output_zero = output_detail['quantization']
+
+    outputs, latencies = [], []
+    for x in inputs:
+        start = time.perf_counter()
+        # int8 models take quantized inputs and return quantized outputs
+        if input_detail['dtype'] == np.int8:
+            x = np.clip(np.round(x / input_scale + input_zero), -128, 127).astype(np.int8)
+        interpreter.set_tensor(input_detail['index'], x[np.newaxis].astype(input_detail['dtype'], copy=False))
+        interpreter.invoke()
+        y = interpreter.get_tensor(output_detail['index'])[0]
+        if output_detail['dtype'] == np.int8:
+            y = (y.astype(np.float32) - output_zero) * output_scale
+        latencies.append((time.perf_counter() - start) * 1000)
+        outputs.append(y)
+    return np.array(outputs, dtype=np.float32), np.array(latencies)
+
+def summarize(probabilities, labels, latencies, model_bytes):
+    """
+    Metrics (metrics.classification_report, including the custom (pred - true) / (pred + true) metric) and
+    latency of one model variant.
+
+    Args:
+        probabilities (np.ndarray): (N, classes) model outputs.
+        labels (np.ndarray): True labels.
+        latencies (np.ndarray): Per-sample latencies in milliseconds.
+        model_bytes (int): Size of the model file.
+
+    Returns:
+        dict: Report entry.
+    """
+
+    report = classification_report(probabilities, labels)
+    report.update({
+        'latency_p50_ms': float(np.percentile(latencies, 50)),
+        'latency_p95_ms': float(np.percentile(latencies, 95)),
+        'size_kib': model_bytes / 1024,
+    })
+    return report
+
+# Usage
+if __name__ == "__main__":
+    # 1. Load the spectrogram store and reproduce cnn-mfcc.py's split
+    if not is_store_current(image_store, image_folder):
+        pack_image_folder(image_folder, image_store, size=image_size, label_range=(0, 10))
+    features, labels, _ = open_feature_store(image_store)
+    labels = labels.astype(np.int64)
+    indices = np.flatnonzero((labels >= 0) & (labels <= 10))
+    train_indices, test_indices = train_test_split(indices, test_size=0.1, random_state=42)
+    test_images, test_labels = load_batch(features, test_indices), labels[test_indices]
+
+    # 2. Representative dataset: training spectrograms only, never the test set
+    representative_inputs = load_batch(features, calibration_indices(train_indices, calibration_samples))
+
+    # 3. Convert and evaluate every precision
+    saved_model_dir = os.path.join(export_dir, SAVED_MODEL_DIR)
+    report = {}
+    for mode in ('float32', 'float16', 'int8'):
+        tflite_file = os.path.join(export_dir, TFLITE_FILES[mode])
+        model_bytes = convert_tflite(saved_model_dir, tflite_file, mode, representative_inputs)
+        probabilities, latencies = run_tflite(tflite_file, test_images, num_threads)
+        report[mode] = summarize(probabilities, test_labels, latencies, model_bytes)
+
+    # 4. Accuracy-vs-latency table
+    print(f"{'model':8s} {'size KiB':>9s} {'accuracy':>9s} {'custom mean':>12s} {'custom std':>11s} "
+          f"{'p50 ms':>8s} {'p95 ms':>8s}")
+    for mode, entry in report.items():
+        print(f"{mode:8s} {entry['size_kib']:9.0f} {entry['accuracy']:9.3f} {entry['custom_mean']:12.4f} "
+              f"{entry['custom_std']:11.4f} {entry['latency_p50_ms']:8.2f} {entry['latency_p95_ms']:8.2f}")
+    with open(report_file, 'w') as f:
+        json.dump({'test_samples': len(test_labels), 'num_threads': num_threads, 'models': report}, f, indent=2)
@@ -0,0 +1,100 @@
+import os
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import stft, istft, get_window
+from noise_profile import load_noise_profile
+
+def compute_average_noise_spectrum(noise_folder, profile_file='noise-profile.npz', nperseg=256):
+    """
+    Average noise spectrum of the "0-*.m4a" recordings in a folder.
+
+    The spectrum is kept in a NoiseProfile saved to profile_file, so only recordings added since the last
+    run are decoded.
+
+    Args:
+        noise_folder (str): Folder containing the noise recordings.
+        profile_file (str): Path of the saved profile.
+        nperseg (int): STFT frame length.
+
+    Returns:
+        np.ndarray: Noise magnitude spectrum of shape (nperseg // 2 + 1, 1).
+    """
+
+    noise_paths = [os.path.join(noise_folder, filename) for filename in sorted(os.listdir(noise_folder))
+                   if filename.startswith("0-") and filename.endswith(".m4a")]
+    # 计算所有噪声频谱的平均值 (单次遍历, 增量更新)
+    return load_noise_profile(profile_file, noise_paths, kind='mean', nperseg=nperseg).mean
+
+def spectral_subtraction_with_noise(audio, sample_rate, noise_spectrum, noise_reduction=0.5):
+    # 将音频数据转换为时域信号
+    _, _, Zxx = stft(audio, fs=sample_rate)
+    # 计算音频的幅度谱
+    magnitude = np.abs(Zxx)
+    # 用给定的噪声谱减去
+    magnitude_clean = np.maximum(magnitude - noise_reduction * noise_spectrum, 0)
+    # 重建信号
+    _, audio_clean = istft(magnitude_clean * np.exp(1j * np.angle(Zxx)), fs=sample_rate)
+    return audio_clean.astype(np.int16)
+
+def spectral_subtraction_stream(blocks, noise_spectrum, noise_reduction=0.5, nperseg=256):
+    """
+    Streaming version of spectral_subtraction_with_noise: overlap-add over fixed-size blocks, constant memory.
+
+    Uses the same frames as scipy's stft/istft defaults (Hann window, 50% overlap, zero padding at both ends,
+    'spectrum' scaling), so the output matches the whole-file version up to float rounding, including its
+    length.
+
+    Args:
+        blocks (iterable): 1D sample blocks of any length (e.g. from pcm_stream.iter_pcm_blocks).
+        noise_spectrum (np.ndarray): Noise magnitude spectrum of shape (nperseg // 2 + 1, 1).
+        noise_reduction (float): Fraction of the noise spectrum to subtract.
+        nperseg (int): Frame length, must match the one the noise spectrum was computed with.
+
+    Yields:
+        np.ndarray: int16 blocks of denoised samples.
+    """
+
+    hop = nperseg // 2
+    window = get_window('hann', nperseg)
+    scale = window.sum()
+    noise = noise_reduction * np.asarray(noise_spectrum).reshape(-1)
+    # 相邻两帧重叠部分的窗平方和 (istft 的归一化)
+    norm = window[:hop] ** 2 + window[hop:] ** 2
+    norm = np.where(norm > 1e-10, norm, 1.0)
+
+    # 缓冲区只保留尚未成帧的样本; 开头补 nperseg // 2 个零 (与 stft 的 boundary='zeros' 相同)
+    pending = np.zeros(hop)
+    tail = None
+
+    def denoise_frames(buffer):
+        nonlocal tail
+        n_frames = (len(buffer) - nperseg) // hop + 1
+        if n_frames <= 0:
+            return buffer, None
+        frames = sliding_window_view(buffer, nperseg)[::hop][:n_frames]
+
+        # 1. 逐帧 STFT, 减去噪声幅度谱, 保留相位
+        Zxx = np.fft.rfft(frames * window, axis=-1) / scale
+        magnitude_clean = np.maximum(np.abs(Zxx) - noise, 0)
+        frames_clean = np.fft.irfft(magnitude_clean * np.exp(1j * np.angle(Zxx)), nperseg, axis=-1) * window * scale
+
+        # 2. 重叠相加: 每帧前半与上一帧后半相加 (第一帧的前半属于开头补零, 丢弃)
+        heads = frames_clean[:, :hop]
+        if tail is None:
+            out = heads[1:] + frames_clean[:-1, hop:]
+        else:
+            out = heads + np.vstack([tail, frames_clean[:-1, hop:]])
+        tail = frames_clean[-1, hop:]
+        return buffer[n_frames * hop:], (out / norm).ravel()
+
+    for block in blocks:
+        pending, out = denoise_frames(np.concatenate([pending, np.asarray(block, dtype=np.float64)]))
+        if out is not None and len(out):
+            yield out.astype(np.int16)
+
+    # 3. 结尾补零: nperseg // 2 个 (boundary), 再补齐到整帧 (padded=True); 最后一帧的后半是补零部分, 丢弃
+    pending = np.concatenate([pending, np.zeros(hop)])
+    pending = np.concatenate([pending, np.zeros(-(len(pending) - nperseg) % hop)])
+    _, out = denoise_frames(pending)
+    if out is not None and len(out):
+        yield out.astype(np.int16)
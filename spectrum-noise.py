@@ -1,7 +1,7 @@
 import numpy as np
-import librosa
 import os
 import matplotlib.pyplot as plt
+from noise_profile import load_noise_profile
 
 # 设置全局字体为 Times New Roman
 plt.rcParams['font.family'] = 'Times New Roman'
@@ -11,59 +11,25 @@ noisy_audio_template = 'iy-code/data-all/0-{}.m4a'  # 带噪音的目标音频
 indices = range(1, 21)  # 索引从 1 到 20
 noise_folder = 'data-all'  # 包含 20 个噪音文件的文件夹
 
-# 初始化噪声谱
-noise_spectrum_sum = None
+noise_profile_file = 'noise-profile-frames.npz'  # 保存的噪声谱 (只解码新增的噪音文件)
 
 # 设置帧大小和步长
 frame_size = 1024
 hop_length = 512
 
-# Find the minimum number of frames among all noise files for padding/truncating
-min_frames = np.inf
-
-# 遍历每个索引文件并累加噪声频谱
+# 收集存在的噪音文件
+noise_paths = []
 for index in indices:
     noisy_audio_path = noisy_audio_template.format(index)  # 根据索引生成路径
     
     if not os.path.exists(noisy_audio_path):
         print(f"文件不存在: {noisy_audio_path}")
         continue
-    
-    # 加载噪音文件
-    noisy_signal, sr = librosa.load(noisy_audio_path, sr=None)
-    
-    # 计算噪声的 STFT
-    noise_stft = librosa.stft(noisy_signal, n_fft=frame_size, hop_length=hop_length)
-    noise_magnitude = np.abs(noise_stft)
-    
-    # 更新最小帧数
-    min_frames = min(min_frames, noise_magnitude.shape[1])
-
-# 计算所有噪音文件的平均频谱
-for index in indices:
-    noisy_audio_path = noisy_audio_template.format(index)
-    
-    if not os.path.exists(noisy_audio_path):
-        continue
-    
-    noisy_signal, sr = librosa.load(noisy_audio_path, sr=None)
-    
-    # 计算噪声的 STFT
-    noise_stft = librosa.stft(noisy_signal, n_fft=frame_size, hop_length=hop_length)
-    noise_magnitude = np.abs(noise_stft)
-    
-    # Truncate/pad the STFT to match the minimum number of frames
-    noise_magnitude = noise_magnitude[:, :min_frames]
-    
-    # 累加噪声谱
-    if noise_spectrum_sum is None:
-        noise_spectrum_sum = noise_magnitude
-    else:
-        noise_spectrum_sum += noise_magnitude
+    noise_paths.append(noisy_audio_path)
 
-# 计算噪声频谱的平均值
-num_noise_files = len(indices)  # 噪音文件数
-average_noise_spectrum = noise_spectrum_sum / num_noise_files
+# 单次遍历计算所有噪音文件的平均频谱 (截断到最短文件的帧数, 除以实际文件数)
+profile = load_noise_profile(noise_profile_file, noise_paths, kind='frames', n_fft=frame_size, hop_length=hop_length)
+average_noise_spectrum = profile.mean
 
 # 可视化平均噪声频谱
 plt.figure(figsize=(10, 6))
@@ -0,0 +1,33 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("librosa")  # feature_store decodes and computes features with librosa
+
+from collision_audio import generate_dataset
+from feature_store import open_feature_store, write_feature_store
+from noise_profile import NoiseProfile
+
+def test_generated_clips_pack_into_feature_store(tmp_path, monkeypatch):
+    """Synthetic .wav clips go through write_feature_store like the .m4a recordings, labels included."""
+    monkeypatch.chdir(tmp_path)  # load_audio keeps its decode cache in the working directory
+
+    # 1. A flat 'mean' noise profile stands in for the recorded noise
+    profile = NoiseProfile('mean', nperseg=256)
+    profile.sample_rate = 44100
+    profile.update(np.full((129, 1), 5.0))
+    profile.save("noise-profile.npz")
+
+    # 2. One noise-only clip and one three-ball clip
+    generate_dataset("clips", "noise-profile.npz", clips_per_label=1, labels=(0, 3), duration=1.0, workers=1)
+    assert sorted(os.listdir("clips")) == ["0-1.wav", "3-1.wav"]
+
+    # 3. Pack them into a mel feature store
+    write_feature_store("clips", "store", kind='mel', workers=1)
+    features, labels, index = open_feature_store("store")
+    assert index["files"] == ["0-1.wav", "3-1.wav"]
+    assert labels.tolist() == [0, 3]
+    assert features.shape == (2, 128, 128)
+    assert np.isfinite(features).all()
+    assert features.min() >= 0.0 and features.max() <= 1.0
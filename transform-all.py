@@ -0,0 +1,114 @@
+import librosa
+import numpy as np
+import os
+from audio_cache import load_audio
+from batch_driver import process_files_in_folder
+from fast_cwt import cwt_fft
+from fast_render import render_matrix, render_waveform, save_png
+from frame_energy import calculate_energy
+
+# Every representation the extractor can produce (one sub-folder of the output folder each)
+REPRESENTATIONS = ('mel', 'stft', 'cqt', 'wavelet', 'waveform', 'mfcc', 'energy')
+
+def m4a_to_representations(m4a_file, output_stem, representations=REPRESENTATIONS, size=(128, 128),
+                           waveform_size=(560, 560), frame_size=256):
+    """
+    Loads an audio file (.m4a or .wav) once and writes any subset of its representations.
+
+    The STFT is computed once and shared by the 'stft', 'mel' and 'mfcc' outputs. Images are rendered with the
+    same settings as transform-mel.py, transform-mfcc.py, transform-cqt.py, transform-wavelet.py and
+    transform-waveform.py; 'energy' is saved as a .npy array of frame energies (as in energy.py).
+
+    Args:
+        m4a_file (str): Path to the audio file (.m4a or .wav).
+        output_stem (str): Output folder joined with the file name without extension; each representation is
+            written to <output folder>/<representation>/<file name>.png (or .npy).
+        representations (tuple): Representations to compute, see REPRESENTATIONS.
+        size (tuple): Size of the spectrogram/scalogram images (width, height).
+        waveform_size (tuple): Size of the waveform image (width, height).
+        frame_size (int): Frame size for the frame energy.
+
+    Returns:
+        tuple: (duration of the audio in seconds, list of written files)
+    """
+
+    output_folder, name = os.path.split(output_stem)
+    path = lambda representation, ext='.png': os.path.join(output_folder, representation, name + ext)
+    outputs = []
+
+    def save(representation, image):
+        save_png(image, path(representation))
+        outputs.append(path(representation))
+
+    # 1. Load the audio file once
+    y, sr = load_audio(m4a_file)
+
+    # 2. Shared STFT for the STFT, Mel and MFCC outputs (same n_fft/hop as librosa's melspectrogram default)
+    if {'stft', 'mel', 'mfcc'} & set(representations):
+        S = np.abs(librosa.stft(y, n_fft=2048, hop_length=512))
+    if 'stft' in representations:
+        save('stft', render_matrix(librosa.amplitude_to_db(S, ref=np.max), size, cmap='magma', y_scale='log'))
+    if {'mel', 'mfcc'} & set(representations):
+        mel = librosa.feature.melspectrogram(S=S ** 2, sr=sr, n_mels=128)
+        if 'mel' in representations:
+            save('mel', render_matrix(librosa.power_to_db(mel, ref=np.max), size, cmap='magma'))
+        if 'mfcc' in representations:
+            # Same as librosa.feature.mfcc(y=y, sr=sr), without recomputing the Mel spectrogram
+            mfcc = librosa.feature.mfcc(S=librosa.power_to_db(mel), sr=sr)
+            save('mfcc', render_matrix(mfcc, size, cmap='coolwarm'))
+
+    # 3. Constant-Q Transform
+    if 'cqt' in representations:
+        cqt_db = librosa.amplitude_to_db(np.abs(librosa.cqt(y, sr=sr, fmin=librosa.note_to_hz('C1'), n_bins=84)),
+                                         ref=np.max)
+        save('cqt', render_matrix(cqt_db, size, cmap='jet'))
+
+    # 4. Continuous Wavelet Transform scalogram
+    if 'wavelet' in representations:
+        scalogram, _ = cwt_fft(y, np.arange(1, 128), 'morl', sampling_period=1/sr, width=size[0])
+        save('wavelet', render_matrix(scalogram, size, cmap='jet', origin='upper'))
+
+    # 5. Waveform
+    if 'waveform' in representations:
+        save('waveform', render_waveform(y, waveform_size))
+
+    # 6. Frame energy
+    if 'energy' in representations:
+        np.save(path('energy', '.npy'), calculate_energy(y, frame_size))
+        outputs.append(path('energy', '.npy'))
+
+    return len(y) / sr, outputs
+
+def process_m4a_files_in_folder(input_folder, output_folder, representations=REPRESENTATIONS, size=(128, 128),
+                                workers=None):
+    """
+    Processes all .m4a or .wav files in a folder and saves the selected representations, decoding each file once.
+
+    Args:
+        input_folder (str): Path to the folder containing audio files (.m4a recordings or .wav synthetic clips).
+        output_folder (str): Path of the output folder; one sub-folder is created per representation.
+        representations (tuple): Representations to compute, see REPRESENTATIONS.
+        size (tuple): Size of the spectrogram/scalogram images (width, height).
+        workers (int): Number of worker processes (None uses every CPU core, 1 runs in the current process).
+
+    Returns:
+        dict: Throughput summary from batch_driver.process_files_in_folder.
+    """
+
+    # 1. Create one sub-folder per representation
+    unknown = set(representations) - set(REPRESENTATIONS)
+    if unknown:
+        raise ValueError(f"Unknown representations: {sorted(unknown)}")
+    for representation in representations:
+        os.makedirs(os.path.join(output_folder, representation), exist_ok=True)
+
+    # 2. Extract everything in one pass per file
+    return process_files_in_folder(m4a_to_representations, input_folder, output_folder, extensions=(".m4a", ".wav"),
+                                   output_ext="", workers=workers, representations=tuple(representations),
+                                   size=size)
+
+# Usage
+if __name__ == "__main__":
+    input_folder = "iy-code/data-all"
+    output_folder = "representations"
+    process_m4a_files_in_folder(input_folder, output_folder)
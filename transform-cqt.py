@@ -2,9 +2,11 @@ import librosa
 import librosa.display
 import matplotlib.pyplot as plt
 import numpy as np
-import os
+from audio_cache import load_audio
+from batch_driver import process_files_in_folder
+from fast_render import render_matrix, save_png
 
-def audio_to_cqt_png(audio_file, png_file, size=(128, 128)):
+def audio_to_cqt_png(audio_file, png_file, size=(128, 128), fast=True):
     """
     Takes an audio file (e.g., .m4a, .wav), computes the Constant-Q Transform (CQT), and saves the spectrogram as a .png file.
 
@@ -12,10 +14,14 @@ def audio_to_cqt_png(audio_file, png_file, size=(128, 128)):
         audio_file (str): Path to the audio file.
         png_file (str): Path to save the .png file.
         size (tuple): Size of the output .png file (width, height).
+        fast (bool): Render straight from the array to an exact-size image instead of via a matplotlib figure.
+
+    Returns:
+        float: Duration of the audio in seconds.
     """
 
     # 1. Load the audio file (librosa supports multiple formats, including .m4a)
-    y, sr = librosa.load(audio_file)
+    y, sr = load_audio(audio_file)
 
     # 2. Compute the Constant-Q Transform (CQT)
     cqt = np.abs(librosa.cqt(y, sr=sr, fmin=librosa.note_to_hz('C1'), n_bins=84))
@@ -23,20 +29,27 @@ def audio_to_cqt_png(audio_file, png_file, size=(128, 128)):
     # 3. Convert the CQT to dB scale for better visualization
     cqt_db = librosa.amplitude_to_db(cqt, ref=np.max)
 
-    # 4. Create a figure and axes for plotting
+    # 4. Fast path: map the matrix through the colormap and resize it straight to the output size
+    if fast:
+        save_png(render_matrix(cqt_db, size, cmap='jet'), png_file)
+        return len(y) / sr
+
+    # 5. Create a figure and axes for plotting
     fig, ax = plt.subplots(figsize=(size[0]/100, size[1]/100), dpi=1300)  # Adjust figsize for desired output size
 
-    # 5. Display the CQT spectrogram
+    # 6. Display the CQT spectrogram
     img = librosa.display.specshow(cqt_db, sr=sr, x_axis='time', y_axis='cqt_note', ax=ax, cmap='jet')
 
-    # 6. Remove axes and labels for a cleaner look
+    # 7. Remove axes and labels for a cleaner look
     ax.axis('off')
 
-    # 7. Save the figure as a .png file
+    # 8. Save the figure as a .png file
     fig.savefig(png_file, bbox_inches='tight', pad_inches=0)
     plt.close(fig)
 
-def process_audio_files_in_folder(input_folder, output_folder, size=(128, 128)):
+    return len(y) / sr
+
+def process_audio_files_in_folder(input_folder, output_folder, size=(128, 128), fast=True, workers=None):
     """
     Processes all .m4a or .wav files in a folder and saves their CQT spectrograms as .png files.
 
@@ -44,23 +57,18 @@ def process_audio_files_in_folder(input_folder, output_folder, size=(128, 128)):
         input_folder (str): Path to the folder containing audio files (.m4a or .wav).
         output_folder (str): Path to save the .png files.
         size (tuple): Size of the output .png files (width, height).
-    """
-
-    # 1. Create the output folder if it doesn't exist
-    os.makedirs(output_folder, exist_ok=True)
+        fast (bool): Render straight from the array instead of via a matplotlib figure.
+        workers (int): Number of worker processes (None uses every CPU core, 1 runs in the current process).
 
-    # 2. Iterate through all files in the input folder
-    for filename in os.listdir(input_folder):
-        if filename.endswith(".m4a") or filename.endswith(".wav"):
-            input_file_path = os.path.join(input_folder, filename)
-            output_file_name = os.path.splitext(filename)[0] + ".png"  # Replace .m4a/.wav with .png
-            output_file_path = os.path.join(output_folder, output_file_name)
+    Returns:
+        dict: Throughput summary from batch_driver.process_files_in_folder.
+    """
 
-            # 3. Process the audio file and save the CQT spectrogram
-            audio_to_cqt_png(input_file_path, output_file_path, size)
-            print(f"Processed: {input_file_path} -> {output_file_path}")
+    return process_files_in_folder(audio_to_cqt_png, input_folder, output_folder, extensions=(".m4a", ".wav"),
+                                   workers=workers, size=size, fast=fast)
 
 # Usage
-input_folder = "data-all"
-output_folder = "cqt-spectrograms"
-process_audio_files_in_folder(input_folder, output_folder)
+if __name__ == "__main__":
+    input_folder = "data-all"
+    output_folder = "cqt-spectrograms"
+    process_audio_files_in_folder(input_folder, output_folder)
@@ -0,0 +1,7 @@
+from feature_store import write_feature_store
+
+# Usage
+if __name__ == "__main__":
+    input_folder = "iy-code/data-all"
+    store_dir = "mel-features"
+    write_feature_store(input_folder, store_dir, kind='mel', dtype='float16')
@@ -1,9 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.io import wavfile
-from pydub import AudioSegment
-import glob
 import os
+from pcm_stream import decode_pcm
 
 # 设置全局字体为 Times New Roman
 plt.rcParams['font.family'] = 'Times New Roman'
@@ -12,50 +10,45 @@ plt.rcParams['font.family'] = 'Times New Roman'
 max_envelope_areas = []
 categories_with_data = []
 
+# 列出一次数据文件夹, 按类别分组 (不再对每个 (i, j) 单独 glob)
+data_folder = 'iy-code/data-all'
+pcm_cache_dir = None  # 设为文件夹路径 (如 '.pcm-cache') 可缓存解码后的 int16 数据
+available_files = set(os.listdir(data_folder)) if os.path.isdir(data_folder) else set()
+
 # 遍历 i 的范围，从 1 到 10
 for i in range(1, 11):
-    waveform_list = []
-    fft_list = []
+    # 流式累加: 只保留当前的频谱和与最短长度, 不保存每个文件的数组
+    fft_sum = None
+    min_length = None
+    file_count = 0
     
     # 遍历 j 的范围，从 1 到 20
     for j in range(1, 21):
-        # 查找同一类文件
-        file_pattern = f'iy-code/data-all/{i}-{j}.m4a'
-        files = glob.glob(file_pattern)
-
         # 确保文件存在
-        if len(files) == 0:
+        if f'{i}-{j}.m4a' not in available_files:
             print(f"文件 {i}-{j}.m4a 未找到，检查文件路径。")
             continue
+        file = os.path.join(data_folder, f'{i}-{j}.m4a')
 
-        # 读取每个文件
-        for file in files:
-            # 将 m4a 文件转换为 wav 文件
-            wav_filename = file.replace('.m4a', '.wav')
-            if not os.path.exists(wav_filename):  # 仅在没有 wav 文件时进行转换
-                audio = AudioSegment.from_file(file, format='m4a')
-                audio.export(wav_filename, format='wav')
-
-            # 读取wav文件
-            sample_rate, data = wavfile.read(wav_filename)
-
-            # 如果音频是立体声(双通道)，将其转换为单声道
-            if len(data.shape) > 1:
-                data = data.mean(axis=1)
+        # 通过 ffmpeg 管道直接解码为单声道 int16 (不再生成 wav 文件)
+        data, sample_rate = decode_pcm(file, cache_dir=pcm_cache_dir)
 
-            # 保存波形数据
-            waveform_list.append(data)
+        # 计算实数傅里叶变换 (只有正频率部分参与包络面积计算)
+        fft_magnitude = np.abs(np.fft.rfft(data))
 
-            # 计算傅里叶变换并保存
-            fft_result = np.fft.fft(data)
-            fft_list.append(np.abs(fft_result))
+        # 截断到目前最短的波形长度, 累加频谱
+        min_length = len(data) if min_length is None else min(min_length, len(data))
+        if fft_sum is None:
+            fft_sum = fft_magnitude[:min_length // 2].copy()
+        else:
+            fft_sum = fft_sum[:min_length // 2]
+            fft_sum += fft_magnitude[:min_length // 2]
+        file_count += 1
 
     # 确保所有 20 个文件被读取
-    if len(waveform_list) > 0 and len(fft_list) > 0:
-        # 对每个类别的 20 个文件的波形和频谱进行平均
-        min_length = min(len(w) for w in waveform_list)  # 找到最短的波形长度，以便对齐数据
-        avg_waveform = np.mean([w[:min_length] for w in waveform_list], axis=0)
-        avg_fft = np.mean([f[:min_length] for f in fft_list], axis=0)
+    if file_count > 0:
+        # 对每个类别的 20 个文件的频谱进行平均
+        avg_fft = fft_sum / file_count
         fft_freq = np.fft.fftfreq(min_length, 1 / sample_rate)
 
         # 计算最大包络面积
@@ -63,7 +56,7 @@ for i in range(1, 11):
         max_envelope_areas.append(envelope_area)
         categories_with_data.append(i)
     else:
-        print(f"类别 {i} 的文件数量不足 20 个，实际读取了 {len(waveform_list)} 个文件。请检查文件路径和文件存在情况。")
+        print(f"类别 {i} 的文件数量不足 20 个，实际读取了 {file_count} 个文件。请检查文件路径和文件存在情况。")
 
 # 绘制最大包络面积的误差棒图
 if max_envelope_areas:
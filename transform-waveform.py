@@ -1,7 +1,8 @@
 import librosa
 import librosa.display
 import matplotlib.pyplot as plt
-import os
+from audio_cache import load_audio
+from batch_driver import process_files_in_folder
 
 def m4a_to_waveform_png(m4a_file, png_file, size=(560, 560)):
     """
@@ -11,10 +12,13 @@ def m4a_to_waveform_png(m4a_file, png_file, size=(560, 560)):
         m4a_file (str): Path to the .m4a file.
         png_file (str): Path to save the .png file.
         size (tuple): Size of the output .png file (width, height).
+
+    Returns:
+        float: Duration of the audio in seconds.
     """
 
     # 1. Load the audio file
-    y, sr = librosa.load(m4a_file)
+    y, sr = load_audio(m4a_file)
 
     # 2. Create a figure and axes for plotting
     fig, ax = plt.subplots(figsize=(size[0]/100, size[1]/100), dpi=1300)  # Adjust figsize for desired output size
@@ -29,7 +33,9 @@ def m4a_to_waveform_png(m4a_file, png_file, size=(560, 560)):
     fig.savefig(png_file, bbox_inches='tight', pad_inches=0)
     plt.close(fig)
 
-def process_m4a_files_in_folder(input_folder, output_folder, size=(560, 560)):
+    return len(y) / sr
+
+def process_m4a_files_in_folder(input_folder, output_folder, size=(560, 560), workers=None):
     """
     Processes all .m4a files in a folder and saves their waveform plots as .png files.
 
@@ -37,23 +43,17 @@ def process_m4a_files_in_folder(input_folder, output_folder, size=(560, 560)):
         input_folder (str): Path to the folder containing .m4a files.
         output_folder (str): Path to save the .png files.
         size (tuple): Size of the output .png files (width, height).
-    """
+        workers (int): Number of worker processes (None uses every CPU core, 1 runs in the current process).
 
-    # 1. Create the output folder if it doesn't exist
-    os.makedirs(output_folder, exist_ok=True)
-
-    # 2. Iterate through all files in the input folder
-    for filename in os.listdir(input_folder):
-        if filename.endswith(".m4a"):  # Adjust to handle .m4a files
-            input_file_path = os.path.join(input_folder, filename)
-            output_file_name = os.path.splitext(filename)[0] + ".png"  # Replace .m4a with .png
-            output_file_path = os.path.join(output_folder, output_file_name)
+    Returns:
+        dict: Throughput summary from batch_driver.process_files_in_folder.
+    """
 
-            # 3. Process the .m4a file and save the waveform
-            m4a_to_waveform_png(input_file_path, output_file_path, size)
-            print(f"Processed: {input_file_path} -> {output_file_path}")
+    return process_files_in_folder(m4a_to_waveform_png, input_folder, output_folder, extensions=(".m4a",),
+                                   workers=workers, size=size)
 
 # Usage
-input_folder = "iy-code/data-all"
-output_folder = "waveforms"
-process_m4a_files_in_folder(input_folder, output_folder)
+if __name__ == "__main__":
+    input_folder = "iy-code/data-all"
+    output_folder = "waveforms"
+    process_m4a_files_in_folder(input_folder, output_folder)
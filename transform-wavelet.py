@@ -1,10 +1,11 @@
-import librosa
 import matplotlib.pyplot as plt
 import numpy as np
-import os
-import pywt  # Importing PyWavelets for the Continuous Wavelet Transform
+from audio_cache import load_audio
+from batch_driver import process_files_in_folder
+from fast_cwt import cwt_fft  # FFT-based equivalent of pywt.cwt
+from fast_render import render_matrix, save_png
 
-def m4a_to_wavelet_png(m4a_file, png_file, size=(128, 128), wavelet_type='morl'):
+def m4a_to_wavelet_png(m4a_file, png_file, size=(128, 128), wavelet_type='morl', fast=True):
     """
     Takes a .m4a file, applies the Continuous Wavelet Transform (CWT), and saves the scalogram as a .png file.
 
@@ -13,33 +14,46 @@ def m4a_to_wavelet_png(m4a_file, png_file, size=(128, 128), wavelet_type='morl')
         png_file (str): Path to save the .png file.
         size (tuple): Size of the output .png file (width, height).
         wavelet_type (str): Type of wavelet to use (e.g., 'morl', 'cmor', etc.).
+        fast (bool): Render straight from the array to an exact-size image instead of via a matplotlib figure.
+
+    Returns:
+        float: Duration of the audio in seconds.
     """
 
     # 1. Load the audio file (supports .m4a if FFmpeg is installed)
-    y, sr = librosa.load(m4a_file)
+    y, sr = load_audio(m4a_file)
 
-    # 2. Perform the Continuous Wavelet Transform (CWT)
+    # 2. Perform the Continuous Wavelet Transform (CWT) in the frequency domain
+    #    (the fast path only needs the magnitude averaged down to the image width)
     scales = np.arange(1, 128)  # Define scales for the wavelet transform
-    coefficients, frequencies = pywt.cwt(y, scales, wavelet_type, sampling_period=1/sr)
+    coefficients, frequencies = cwt_fft(y, scales, wavelet_type, sampling_period=1/sr,
+                                        width=size[0] if fast else None)
 
     # 3. Convert the coefficients to power (similar to amplitude for better visualization)
     coefficients = np.abs(coefficients)
 
-    # 4. Create a figure and axes for plotting
+    # 4. Fast path: map the matrix through the colormap and resize it straight to the output size
+    if fast:
+        save_png(render_matrix(coefficients, size, cmap='jet', origin='upper'), png_file)
+        return len(y) / sr
+
+    # 5. Create a figure and axes for plotting
     fig, ax = plt.subplots(figsize=(size[0]/100, size[1]/100), dpi=1300)  # Adjust figsize for desired output size
 
-    # 5. Display the scalogram (CWT coefficients) as an image
+    # 6. Display the scalogram (CWT coefficients) as an image
     img = ax.imshow(coefficients, extent=[0, len(y)/sr, 1, 128], cmap='jet', aspect='auto',
                     vmax=np.max(coefficients), vmin=np.min(coefficients))
 
-    # 6. Remove axes and labels for a cleaner look
+    # 7. Remove axes and labels for a cleaner look
     ax.axis('off')
 
-    # 7. Save the figure as a .png file
+    # 8. Save the figure as a .png file
     fig.savefig(png_file, bbox_inches='tight', pad_inches=0)
     plt.close(fig)
 
-def process_m4a_files_in_folder(input_folder, output_folder, size=(128, 128), wavelet_type='morl'):
+    return len(y) / sr
+
+def process_m4a_files_in_folder(input_folder, output_folder, size=(128, 128), wavelet_type='morl', fast=True, workers=None):
     """
     Processes all .m4a files in a folder and saves their scalograms as .png files.
 
@@ -48,23 +62,18 @@ def process_m4a_files_in_folder(input_folder, output_folder, size=(128, 128), wa
         output_folder (str): Path to save the .png files.
         size (tuple): Size of the output .png files (width, height).
         wavelet_type (str): Type of wavelet to use for the CWT (e.g., 'morl', 'cmor', etc.).
-    """
-
-    # 1. Create the output folder if it doesn't exist
-    os.makedirs(output_folder, exist_ok=True)
+        fast (bool): Render straight from the array instead of via a matplotlib figure.
+        workers (int): Number of worker processes (None uses every CPU core, 1 runs in the current process).
 
-    # 2. Iterate through all files in the input folder
-    for filename in os.listdir(input_folder):
-        if filename.endswith(".m4a"):
-            input_file_path = os.path.join(input_folder, filename)
-            output_file_name = os.path.splitext(filename)[0] + ".png"  # Replace .m4a with .png
-            output_file_path = os.path.join(output_folder, output_file_name)
+    Returns:
+        dict: Throughput summary from batch_driver.process_files_in_folder.
+    """
 
-            # 3. Process the .m4a file and save the scalogram
-            m4a_to_wavelet_png(input_file_path, output_file_path, size, wavelet_type)
-            print(f"Processed: {input_file_path} -> {output_file_path}")
+    return process_files_in_folder(m4a_to_wavelet_png, input_folder, output_folder, extensions=(".m4a",),
+                                   workers=workers, size=size, wavelet_type=wavelet_type, fast=fast)
 
 # Usage
-input_folder = "iy-code/data-all"
-output_folder = "wavelet-scalograms"
-process_m4a_files_in_folder(input_folder, output_folder)
+if __name__ == "__main__":
+    input_folder = "iy-code/data-all"
+    output_folder = "wavelet-scalograms"
+    process_m4a_files_in_folder(input_folder, output_folder)